@@ -1,23 +1,43 @@
 import os
 import re
 import json
-import uuid
+import hashlib
+import secrets
+import time
 import shutil
+import asyncio
 import threading
+from collections import OrderedDict, deque, namedtuple
+from functools import lru_cache, partial
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file
+from urllib.parse import quote, urlsplit
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
-from ffmpeg._run import Error as FFmpegError
 import yt_dlp
-import ffmpeg
+from yt_dlp.extractor.youtube import YoutubeIE
+
+# Faster JSON encoding for the polled /status endpoint is optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Streaming multipart parser is optional; fall back to Werkzeug's parser
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.parser import ParseFailedException
+    from streaming_form_data.targets import FileTarget
+except ImportError:
+    StreamingFormDataParser = None
 
 
 
 # Try to import config, use defaults if not available
 try:
-    from config import CONFIG, get_config
+    from config import CONFIG, get_config, get_config_json
 except ImportError:
     # Default configuration if config.py doesn't exist
+    FormatSpec = namedtuple('FormatSpec', 'ext codec')
     CONFIG = {
         'server': {'max_content_length': 500 * 1024 * 1024},
         'directories': {
@@ -26,14 +46,14 @@ except ImportError:
             'temp_folder': 'temp'
         },
         'formats': {
-            'mp3': {'ext': 'mp3', 'codec': 'libmp3lame'},
-            'ogg': {'ext': 'ogg', 'codec': 'libvorbis'},
-            'wav': {'ext': 'wav', 'codec': 'pcm_s16le'},
-            'flac': {'ext': 'flac', 'codec': 'flac'},
-            'aac': {'ext': 'aac', 'codec': 'aac'},
-            'm4a': {'ext': 'm4a', 'codec': 'aac'},
-            'opus': {'ext': 'opus', 'codec': 'libopus'},
-            'wma': {'ext': 'wma', 'codec': 'wmav2'}
+            'mp3': FormatSpec('mp3', 'libmp3lame'),
+            'ogg': FormatSpec('ogg', 'libvorbis'),
+            'wav': FormatSpec('wav', 'pcm_s16le'),
+            'flac': FormatSpec('flac', 'flac'),
+            'aac': FormatSpec('aac', 'aac'),
+            'm4a': FormatSpec('m4a', 'aac'),
+            'opus': FormatSpec('opus', 'libopus'),
+            'wma': FormatSpec('wma', 'wmav2')
         }
     }
 
@@ -41,31 +61,180 @@ except ImportError:
     def get_config(key=None):
         return CONFIG.get(key) if key else CONFIG
 
+
+    def get_config_json():
+        formats = {key: spec._asdict() for key, spec in CONFIG['formats'].items()}
+        return json.dumps(dict(CONFIG, formats=formats)).encode()
+
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = CONFIG['server']['max_content_length']
 app.config['UPLOAD_FOLDER'] = CONFIG['directories']['upload_folder']
 app.config['OUTPUT_FOLDER'] = CONFIG['directories']['output_folder']
 
+# Let the front-end web server send downloads with sendfile(2). nginx wants
+# X-Accel-Redirect to an internal location aliased to the output folder.
+X_ACCEL_REDIRECT_PREFIX = CONFIG['server'].get('x_accel_redirect_prefix')
+app.use_x_sendfile = CONFIG['server'].get('use_x_sendfile', False) or bool(X_ACCEL_REDIRECT_PREFIX)
+
 # Create necessary directories
 for folder in CONFIG['directories'].values():
     os.makedirs(folder, exist_ok=True)
 
+# Converted YouTube audio, reused by later jobs with the same settings
+CACHE_FOLDER = CONFIG['directories'].get('cache_folder', 'cache')
+os.makedirs(CACHE_FOLDER, exist_ok=True)
+
 # Supported audio formats
 AUDIO_FORMATS = CONFIG['formats']
 
-# Conversion jobs tracking
+# Static /formats response body, serialized once
+FORMAT_DETAILS_JSON = json.dumps({
+    'mp3': {'name': 'MP3', 'description': 'Most compatible format'},
+    'ogg': {'name': 'OGG Vorbis', 'description': 'Open format, great for games'},
+    'wav': {'name': 'WAV', 'description': 'Uncompressed, highest quality'},
+    'flac': {'name': 'FLAC', 'description': 'Lossless compression'},
+    'aac': {'name': 'AAC', 'description': 'Advanced audio coding'},
+    'm4a': {'name': 'M4A', 'description': 'Apple audio format'},
+    'opus': {'name': 'Opus', 'description': 'Modern, efficient codec'},
+    'wma': {'name': 'WMA', 'description': 'Windows Media Audio'}
+}).encode()
+
+# Read/write size for file transfers (uploads, downloads)
+IO_CHUNK_SIZE = 64 * 1024
+
+# Hosts treated as YouTube links (subdomains such as m. and music. included)
+YOUTUBE_HOSTS = ('youtube.com', 'youtu.be')
+YOUTUBE_SUBDOMAIN_SUFFIXES = tuple(f'.{host}' for host in YOUTUBE_HOSTS)
+
+# Bitrates as ffmpeg's -b:a takes them, e.g. "192k" or "192000"
+BITRATE_RE = re.compile(r'[1-9]\d*[kKmM]?')
+
+# Codec name reported by ffprobe for each encoder we use
+ENCODER_CODEC_NAMES = {
+    'libmp3lame': 'mp3',
+    'libvorbis': 'vorbis',
+    'libopus': 'opus',
+    'aac': 'aac',
+    'flac': 'flac',
+    'pcm_s16le': 'pcm_s16le',
+    'wmav2': 'wmav2',
+    'libfdk_aac': 'aac',
+    'aac_at': 'aac',
+}
+
+# Faster encoders to use instead of a format's default when ffmpeg has them,
+# in order of preference
+ENCODER_ALTERNATIVES = {
+    'aac': ('libfdk_aac', 'aac_at'),
+}
+available_encoders = None
+
+# Probed audio codecs keyed by (device, inode, mtime, size), so converting the
+# same file again doesn't spawn another ffprobe. Only used from the event loop.
+audio_codec_cache = OrderedDict()
+AUDIO_CODEC_CACHE_SIZE = 1024
+
+# Leading ffmpeg arguments shared by every conversion
+ffmpeg_config = CONFIG.get('ffmpeg', {})
+FFMPEG_GLOBAL_ARGS = [
+    'ffmpeg', '-nostdin',
+    '-loglevel', ffmpeg_config.get('loglevel', 'error'),
+    '-y' if ffmpeg_config.get('overwrite', True) else '-n',
+]
+if ffmpeg_config.get('hide_banner', True):
+    FFMPEG_GLOBAL_ARGS.append('-hide_banner')
+FFMPEG_THREADS = str(ffmpeg_config.get('threads', 0))
+
+# Encoder options trading a little quality at the chosen bitrate for speed
+ENCODER_SPEED_ARGS = {
+    'libmp3lame': ('-compression_level', '7'),  # 0 = slowest, 9 = fastest
+    'libopus': ('-compression_level', '5'),  # 10 = slowest, 0 = fastest
+} if ffmpeg_config.get('fast_encoding', True) else {}
+
+# Background event loop running the conversion pipeline. ffmpeg runs as an
+# asyncio subprocess, so a waiting job costs a pipe rather than a thread;
+# blocking work (yt-dlp, directory sweeps) goes to the loop's thread pool.
+conversion_config = CONFIG.get('conversion', {})
+conversion_loop = asyncio.new_event_loop()
+threading.Thread(target=conversion_loop.run_forever, daemon=True).start()
+
+
+async def create_queue():
+    """Create an asyncio queue bound to the running loop"""
+    return asyncio.Queue()
+
+
+# Jobs wait in conversion_queue for one of a fixed set of workers, so
+# max_parallel_jobs caps how many run at once; conversion_slots caps how
+# many may be waiting at once
+conversion_queue = asyncio.run_coroutine_threadsafe(create_queue(), conversion_loop).result()
+MAX_PARALLEL_JOBS = conversion_config.get('max_parallel_jobs', min(8, os.cpu_count() or 1))
+conversion_slots = threading.BoundedSemaphore(conversion_config.get('max_queued_jobs', 100))
+
+# Conversion jobs tracking. With a Redis URL configured, jobs are shared by
+# every worker process; otherwise they live in this process's memory.
 conversion_jobs = {}
+JOB_TTL_SECONDS = conversion_config.get('cleanup_after_hours', 24) * 3600
+
+if conversion_config.get('redis_url'):
+    import redis
+    redis_client = redis.Redis.from_url(conversion_config['redis_url'], decode_responses=True, max_connections=32)
+else:
+    redis_client = None
+
+
+def save_job(job_id, **fields):
+    """Create a conversion job or update some of its fields"""
+    if redis_client is None:
+        conversion_jobs.setdefault(job_id, {}).update(fields)
+        return
+
+    key = f'job:{job_id}'
+    pipe = redis_client.pipeline()
+    pipe.hset(key, mapping=fields)
+    pipe.expire(key, JOB_TTL_SECONDS)
+    pipe.execute()
+
+
+async def save_job_async(job_id, **fields):
+    """save_job for the conversion loop; Redis round-trips run on the loop's thread pool"""
+    if redis_client is None:
+        save_job(job_id, **fields)
+    else:
+        await conversion_loop.run_in_executor(None, partial(save_job, job_id, **fields))
+
+
+def get_job(job_id):
+    """Get a conversion job, or None if it doesn't exist"""
+    if redis_client is None:
+        return conversion_jobs.get(job_id)
+
+    job = redis_client.hgetall(f'job:{job_id}')
+    if not job:
+        return None
+    job['progress'] = int(job['progress'])
+    return job
 
 
 def is_youtube_url(url):
     """Check if URL is a YouTube link"""
-    youtube_regex = r'(youtube\.com|youtu\.be)'
-    return re.search(youtube_regex, url) is not None
+    try:
+        # Accept scheme-less links like "youtu.be/xyz" as well
+        host = urlsplit(url if '//' in url else f'//{url}').hostname or ''
+    except ValueError:
+        return False
+    return host in YOUTUBE_HOSTS or host.endswith(YOUTUBE_SUBDOMAIN_SUFFIXES)
 
 
 def download_youtube_audio(url, job_id):
     """Download audio from YouTube video"""
     output_path = os.path.join('temp', f'{job_id}_youtube.%(ext)s')
+    downloaded = {}
+
+    def postprocessor_hook(d):
+        # The last finished postprocessor reports the final file location
+        if d['status'] == 'finished':
+            downloaded['path'] = d['info_dict'].get('filepath')
 
     ydl_opts = {
         'format': 'bestaudio/best',
@@ -77,89 +246,324 @@ def download_youtube_audio(url, job_id):
         }],
         'quiet': True,
         'no_warnings': True,
+        'http_chunk_size': 10 * 1024 * 1024,
+        'concurrent_fragment_downloads': 4,
+        'buffersize': IO_CHUNK_SIZE,
+        'postprocessor_hooks': [postprocessor_hook],
     }
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=True)
             title = info.get('title', 'Unknown')
-            # Find the downloaded file
-            for file in os.listdir('temp'):
-                if file.startswith(f'{job_id}_youtube'):
-                    return os.path.join('temp', file), title
     except Exception as e:
         raise Exception(f"YouTube download failed: {str(e)}")
 
+    if not downloaded.get('path'):
+        raise Exception("YouTube download failed: downloaded file not found")
+    return downloaded['path'], title
+
+
+def get_cache_path(url, output_format, sample_rate, bitrate):
+    """Get the cache file for a YouTube conversion, or None if it can't be cached"""
+    if output_format not in AUDIO_FORMATS or not YoutubeIE.suitable(url):
+        return None
+
+    video_id = YoutubeIE._match_id(url)
+    key = hashlib.sha1(f'{video_id}|{output_format}|{sample_rate}|{bitrate}'.encode()).hexdigest()
+    return os.path.join(CACHE_FOLDER, f"{key}.{AUDIO_FORMATS[output_format].ext}")
+
+
+def link_file(source_path, target_path):
+    """Hard-link source_path to target_path, copying if links aren't supported"""
+    try:
+        os.link(source_path, target_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(source_path, target_path)
+
 
-def convert_audio(input_path, output_format, sample_rate=None, bitrate=None, job_id=None):
+def get_workspace(job_id):
+    """Get the private temp directory for a job's input files"""
+    return os.path.join('temp', job_id)
+
+
+def stage_input(source_path, job_id):
+    """Link an uploaded file into the job's workspace so cleanup can't remove it mid-conversion"""
+    workspace = get_workspace(job_id)
+    os.makedirs(workspace, exist_ok=True)
+    work_path = os.path.join(workspace, os.path.basename(source_path))
+    link_file(source_path, work_path)
+    return work_path
+
+
+def remove_file(path):
+    """Delete a file if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def remove_workspace(job_id):
+    """Delete a job's workspace on the loop's thread pool"""
+    await conversion_loop.run_in_executor(None, partial(shutil.rmtree, get_workspace(job_id), ignore_errors=True))
+
+
+async def get_audio_codec(input_path):
+    """Return the codec name of the first audio stream, or None if unknown"""
+    try:
+        stat = os.stat(input_path)
+    except OSError:
+        return None
+
+    # Each job probes its own hard link of the upload, so key on the inode, not the path
+    key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if key in audio_codec_cache:
+        audio_codec_cache.move_to_end(key)
+        return audio_codec_cache[key]
+
+    codec = await probe_audio_codec(input_path)
+
+    audio_codec_cache[key] = codec
+    if len(audio_codec_cache) > AUDIO_CODEC_CACHE_SIZE:
+        audio_codec_cache.popitem(last=False)
+    return codec
+
+
+async def probe_audio_codec(input_path):
+    """Run ffprobe to get the codec name of the first audio stream"""
+    proc = await asyncio.create_subprocess_exec(
+        'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+        '-show_entries', 'stream=codec_name', '-of', 'json', input_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    stdout, _ = await proc.communicate()
+    if proc.returncode != 0:
+        return None
+
+    streams = json.loads(stdout).get('streams', [])
+    return streams[0].get('codec_name') if streams else None
+
+
+@lru_cache(maxsize=256)
+def build_output_args(codec, sample_rate=None, bitrate=None):
+    """Build the ffmpeg options for a single audio-only output (cached per settings)"""
+    args = ['-vn', '-c:a', codec]
+
+    if codec != 'copy':
+        args += ['-threads', FFMPEG_THREADS, *ENCODER_SPEED_ARGS.get(codec, ())]
+
+    if sample_rate:
+        args += ['-ar', str(sample_rate)]
+
+    if bitrate:
+        args += ['-b:a', str(bitrate)]
+
+    return tuple(args)
+
+
+async def run_ffmpeg(argv):
+    """Run an ffmpeg command, raising with its error output on failure"""
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    # Only keep the last lines of output so a chatty run can't grow memory
+    stderr_tail = deque(maxlen=200)
+    async for line in proc.stderr:
+        stderr_tail.append(line)
+
+    if await proc.wait() != 0:
+        error_message = b''.join(stderr_tail).decode(errors='replace') or f'ffmpeg exited with code {proc.returncode}'
+        raise Exception(f"Conversion failed: {error_message}")
+
+
+async def get_available_encoders():
+    """Get the names of the audio encoders ffmpeg supports, probed once"""
+    global available_encoders
+    if available_encoders is None:
+        proc = await asyncio.create_subprocess_exec(
+            'ffmpeg', '-hide_banner', '-encoders',
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await proc.communicate()
+        # Audio encoder lines look like " A....D aac    AAC (Advanced Audio Coding)"
+        available_encoders = {
+            line.split()[1] for line in stdout.decode(errors='replace').splitlines()
+            if line.startswith(' A') and len(line.split()) > 1
+        }
+    return available_encoders
+
+
+def get_output_path(input_path, format_info, job_id):
+    """Get the output file path for a converted input"""
+    output_filename = f"{Path(input_path).stem}.{format_info.ext}"
+    return os.path.join(app.config['OUTPUT_FOLDER'], f"{job_id}_{output_filename}")
+
+
+async def select_codec(input_path, format_info, sample_rate=None, bitrate=None):
+    """Get the codec to convert with, or 'copy' if the source can be remuxed as-is"""
+    codec = format_info.codec
+    # If nothing needs resampling and the source already uses the target
+    # codec, just remux the packets instead of re-encoding
+    if not sample_rate and not bitrate and await get_audio_codec(input_path) == ENCODER_CODEC_NAMES.get(codec):
+        return 'copy'
+
+    encoders = await get_available_encoders()
+    for alternative in ENCODER_ALTERNATIVES.get(codec, ()):
+        if alternative in encoders:
+            return alternative
+    return codec
+
+
+async def convert_audio(input_path, output_format, sample_rate=None, bitrate=None, job_id=None):
     """Convert audio file to specified format"""
     if output_format not in AUDIO_FORMATS:
         raise ValueError(f"Unsupported format: {output_format}")
 
     format_info = AUDIO_FORMATS[output_format]
-    output_filename = f"{Path(input_path).stem}.{format_info['ext']}"
-    output_path = os.path.join(app.config['OUTPUT_FOLDER'], f"{job_id}_{output_filename}")
+    output_path = get_output_path(input_path, format_info, job_id)
+    codec = await select_codec(input_path, format_info, sample_rate, bitrate)
 
-    try:
-        # Build ffmpeg command
-        stream = ffmpeg.input(input_path)
+    await run_ffmpeg([*FFMPEG_GLOBAL_ARGS, '-i', input_path, *build_output_args(codec, sample_rate, bitrate),
+                      output_path])
 
-        # Audio parameters
-        audio_params = {'acodec': format_info['codec']}
+    return output_path
 
-        if sample_rate:
-            audio_params['ar'] = sample_rate
 
-        if bitrate:
-            audio_params['audio_bitrate'] = bitrate
+async def convert_audio_batch(input_paths, output_format, sample_rate=None, bitrate=None, job_ids=None):
+    """Convert several audio files with a single ffmpeg process"""
+    if output_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported format: {output_format}")
 
-        # Apply audio parameters
-        stream = ffmpeg.output(stream, output_path, **audio_params)
+    format_info = AUDIO_FORMATS[output_format]
+    argv = list(FFMPEG_GLOBAL_ARGS)
+    for input_path in input_paths:
+        argv += ['-i', input_path]
 
-        # Run conversion
-        ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+    codecs = await asyncio.gather(*(
+        select_codec(input_path, format_info, sample_rate, bitrate) for input_path in input_paths
+    ))
 
-        return output_path
+    # One output per input, each mapped to its input's first audio stream
+    output_paths = []
+    for index, (input_path, job_id, codec) in enumerate(zip(input_paths, job_ids, codecs)):
+        output_path = get_output_path(input_path, format_info, job_id)
+        argv += ['-map', f'{index}:a:0', *build_output_args(codec, sample_rate, bitrate), output_path]
+        output_paths.append(output_path)
 
-    except FFmpegError as e:
-        error_message = e.stderr.decode() if e.stderr else str(e)
-        raise Exception(f"Conversion failed: {error_message}")
+    await run_ffmpeg(argv)
 
+    return output_paths
 
-def process_conversion_job(job_id, source_type, source_data, output_format, sample_rate, bitrate):
+
+async def process_conversion_job(job_id, source_type, source_data, output_format, sample_rate, bitrate):
     """Process a single conversion job"""
     try:
-        conversion_jobs[job_id]['status'] = 'processing'
-        conversion_jobs[job_id]['progress'] = 20
+        await save_job_async(job_id, status='processing', progress=20)
 
         # Get input file
         if source_type == 'youtube':
-            conversion_jobs[job_id]['message'] = 'Downloading from YouTube...'
-            input_path, title = download_youtube_audio(source_data, job_id)
-            conversion_jobs[job_id]['filename'] = title
-            conversion_jobs[job_id]['progress'] = 60
+            cache_path = get_cache_path(source_data, output_format, sample_rate, bitrate)
+            if cache_path and os.path.exists(cache_path):
+                output_path = get_output_path(f'{job_id}_youtube', AUDIO_FORMATS[output_format], job_id)
+                await conversion_loop.run_in_executor(None, link_file, cache_path, output_path)
+                # Touch the entry so the cleanup sweep evicts least recently used files
+                await conversion_loop.run_in_executor(None, os.utime, cache_path)
+                await save_job_async(job_id, status='completed', progress=100, output_path=output_path,
+                                     message='Conversion completed!')
+                return
+
+            await save_job_async(job_id, message='Downloading from YouTube...')
+            input_path, title = await conversion_loop.run_in_executor(
+                None, download_youtube_audio, source_data, job_id
+            )
+            await save_job_async(job_id, filename=title, progress=60)
         else:  # file upload
-            input_path = source_data
-            conversion_jobs[job_id]['progress'] = 60
+            # Linking may fall back to copying the whole upload; keep it off the loop
+            input_path = await conversion_loop.run_in_executor(None, stage_input, source_data, job_id)
+            await save_job_async(job_id, progress=60)
 
         # Convert audio
-        conversion_jobs[job_id]['message'] = 'Converting audio...'
-        output_path = convert_audio(input_path, output_format, sample_rate, bitrate, job_id)
+        await save_job_async(job_id, message='Converting audio...')
+        output_path = await convert_audio(input_path, output_format, sample_rate, bitrate, job_id)
 
         # Update job status
-        conversion_jobs[job_id]['status'] = 'completed'
-        conversion_jobs[job_id]['progress'] = 100
-        conversion_jobs[job_id]['output_path'] = output_path
-        conversion_jobs[job_id]['message'] = 'Conversion completed!'
+        await save_job_async(job_id, status='completed', progress=100, output_path=output_path,
+                             message='Conversion completed!')
 
-        # Clean up temp file
-        if source_type == 'youtube' and os.path.exists(input_path):
-            os.remove(input_path)
+        # Clean up temp file and keep the result for repeat requests
+        if source_type == 'youtube':
+            await conversion_loop.run_in_executor(None, remove_file, input_path)
+            if cache_path:
+                await conversion_loop.run_in_executor(None, link_file, output_path, cache_path)
 
     except Exception as e:
-        conversion_jobs[job_id]['status'] = 'failed'
-        conversion_jobs[job_id]['error'] = str(e)
-        conversion_jobs[job_id]['message'] = f'Error: {str(e)}'
+        await save_job_async(job_id, status='failed', error=str(e), message=f'Error: {str(e)}')
+
+    finally:
+        if source_type != 'youtube':
+            await remove_workspace(job_id)
+
+
+async def process_conversion_batch(job_ids, input_paths, output_format, sample_rate, bitrate):
+    """Process several uploaded file jobs that share the same settings"""
+    if len(job_ids) == 1:
+        await process_conversion_job(job_ids[0], 'file', input_paths[0], output_format, sample_rate, bitrate)
+        return
+
+    for job_id in job_ids:
+        await save_job_async(job_id, status='processing', progress=60, message='Converting audio...')
+
+    try:
+        work_paths = await asyncio.gather(*(
+            conversion_loop.run_in_executor(None, stage_input, input_path, job_id)
+            for job_id, input_path in zip(job_ids, input_paths)
+        ))
+        output_paths = await convert_audio_batch(work_paths, output_format, sample_rate, bitrate, job_ids)
+    except Exception:
+        # Retry one file at a time so a bad input only fails its own job
+        for job_id, input_path in zip(job_ids, input_paths):
+            await remove_workspace(job_id)
+            await process_conversion_job(job_id, 'file', input_path, output_format, sample_rate, bitrate)
+        return
+    finally:
+        await asyncio.gather(*(remove_workspace(job_id) for job_id in job_ids))
+
+    for job_id, output_path in zip(job_ids, output_paths):
+        await save_job_async(job_id, status='completed', progress=100, output_path=output_path,
+                             message='Conversion completed!')
+
+
+async def conversion_worker():
+    """Run queued job coroutines one at a time, freeing their job slots as they finish"""
+    while True:
+        job_count, job = await conversion_queue.get()
+        try:
+            await job
+        except Exception:
+            # Jobs record their own failures; keep the worker alive regardless
+            pass
+        finally:
+            for _ in range(job_count):
+                conversion_slots.release()
+            conversion_queue.task_done()
+
+
+def submit_conversion(job_count, job):
+    """Queue a job coroutine holding job_count job slots for the conversion workers"""
+    conversion_loop.call_soon_threadsafe(conversion_queue.put_nowait, (job_count, job))
+
+
+# Start the persistent conversion workers
+for _ in range(MAX_PARALLEL_JOBS):
+    asyncio.run_coroutine_threadsafe(conversion_worker(), conversion_loop)
 
 
 @app.route('/')
@@ -181,41 +585,143 @@ def convert():
     if not sources:
         return jsonify({'error': 'No sources provided'}), 400
 
-    job_ids = []
-
+    # Settings go on ffmpeg's command line and into cache keys, so only
+    # accept plain numbers and bitrate strings
+    if sample_rate in (None, ''):
+        sample_rate = None
+    elif isinstance(sample_rate, (int, str)) and not isinstance(sample_rate, bool) \
+            and str(sample_rate).isdecimal() and int(sample_rate) > 0:
+        sample_rate = int(sample_rate)
+    else:
+        return jsonify({'error': 'Invalid sample rate'}), 400
+
+    if bitrate in (None, ''):
+        bitrate = None
+    elif isinstance(bitrate, (int, str)) and not isinstance(bitrate, bool) and BITRATE_RE.fullmatch(str(bitrate)):
+        bitrate = str(bitrate)
+    else:
+        return jsonify({'error': 'Invalid bitrate'}), 400
+
+    # Validate every source before reserving anything
+    youtube_jobs = []
+    file_jobs = []
+    names = {}
     for source in sources:
-        job_id = str(uuid.uuid4())
-        source_type = source['type']
-
-        # Initialize job
-        conversion_jobs[job_id] = {
-            'id': job_id,
-            'status': 'queued',
-            'progress': 0,
-            'filename': source.get('name', 'Unknown'),
-            'message': 'Queued for processing...'
-        }
-
-        if source_type == 'youtube':
-            source_data = source['url']
+        if not isinstance(source, dict):
+            return jsonify({'error': 'Invalid source'}), 400
+        location = source.get('url') if source.get('type') == 'youtube' else source.get('path')
+        if not location:
+            return jsonify({'error': 'Each source needs a url or path'}), 400
+
+        job_id = secrets.token_hex(16)
+        names[job_id] = source.get('name', 'Unknown')
+        if source.get('type') == 'youtube':
+            youtube_jobs.append((job_id, location))
         else:  # file
-            source_data = source['path']
+            file_jobs.append((job_id, location))
+
+    # Reserve a slot for every source up front so a request is either fully
+    # accepted or rejected
+    reserved = 0
+    for _ in sources:
+        if not conversion_slots.acquire(blocking=False):
+            for _ in range(reserved):
+                conversion_slots.release()
+            return jsonify({'error': 'Too many conversions in progress, try again later'}), 429
+        reserved += 1
+
+    # Uploaded files all share this request's settings, so convert them a
+    # batch at a time to share one ffmpeg process between them
+    batch_size = conversion_config.get('ffmpeg_batch_size', 8)
+    submissions = [
+        (1, process_conversion_job(job_id, 'youtube', url, output_format, sample_rate, bitrate))
+        for job_id, url in youtube_jobs
+    ]
+    for start in range(0, len(file_jobs), batch_size):
+        batch_job_ids, batch_paths = zip(*file_jobs[start:start + batch_size])
+        submissions.append((len(batch_job_ids), process_conversion_batch(list(batch_job_ids), list(batch_paths),
+                                                                         output_format, sample_rate, bitrate)))
+
+    submitted = 0
+    try:
+        for job_id, filename in names.items():
+            save_job(
+                job_id,
+                id=job_id,
+                status='queued',
+                progress=0,
+                filename=filename,
+                message='Queued for processing...'
+            )
+
+        for job_count, job in submissions:
+            submit_conversion(job_count, job)
+            submitted += 1
+    except Exception:
+        # Slots of jobs that never reached the workers would otherwise leak
+        for job_count, job in submissions[submitted:]:
+            job.close()
+            for _ in range(job_count):
+                conversion_slots.release()
+        raise
+
+    return jsonify({'jobIds': list(names)})
+
+
+def stream_upload(file_id):
+    """Parse a multipart upload chunk by chunk, writing the file straight to the upload folder"""
+    if (request.content_length or 0) > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'File too large'}), 413
+
+    partial_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.part")
+    target = FileTarget(partial_path)
+
+    received = False
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register('file', target)
+
+        while True:
+            chunk = request.stream.read(IO_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+        received = True
+    except ParseFailedException as e:
+        return jsonify({'error': f'Invalid upload: {str(e)}'}), 400
+    finally:
+        # A bad body, an oversized chunked upload, a dropped client or a write
+        # error all leave a partial file behind; close and discard it
+        if not received:
+            target.finish()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+    if target.multipart_filename is None:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return jsonify({'error': 'No file provided'}), 400
 
-        # Start conversion in background thread
-        thread = threading.Thread(
-            target=process_conversion_job,
-            args=(job_id, source_type, source_data, output_format, sample_rate, bitrate)
-        )
-        thread.start()
+    filename = secure_filename(target.multipart_filename)
+    if filename == '':
+        os.remove(partial_path)
+        return jsonify({'error': 'No file selected'}), 400
 
-        job_ids.append(job_id)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
+    os.replace(partial_path, filepath)
 
-    return jsonify({'jobIds': job_ids})
+    return jsonify({
+        'path': filepath,
+        'name': filename
+    })
 
 
 @app.route('/upload', methods=['POST'])
 def upload():
     """Handle file upload"""
+    if StreamingFormDataParser is not None:
+        return stream_upload(secrets.token_hex(16))
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
 
@@ -225,9 +731,10 @@ def upload():
 
     # Save uploaded file
     filename = secure_filename(file.filename)
-    file_id = str(uuid.uuid4())
+    file_id = secrets.token_hex(16)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
-    file.save(filepath)
+    with open(filepath, 'wb', buffering=IO_CHUNK_SIZE) as f:
+        shutil.copyfileobj(file.stream, f, length=IO_CHUNK_SIZE)
 
     return jsonify({
         'path': filepath,
@@ -235,22 +742,30 @@ def upload():
     })
 
 
+def json_response(data, status=200):
+    """Build a JSON response, encoded with orjson when it's available"""
+    if orjson is None:
+        return jsonify(data), status
+    return Response(orjson.dumps(data), status=status, mimetype='application/json')
+
+
 @app.route('/status/<job_id>')
 def get_status(job_id):
     """Get conversion job status"""
-    if job_id not in conversion_jobs:
-        return jsonify({'error': 'Job not found'}), 404
+    job = get_job(job_id)
+    if job is None:
+        return json_response({'error': 'Job not found'}, 404)
 
-    return jsonify(conversion_jobs[job_id])
+    return json_response(job)
 
 
 @app.route('/download/<job_id>')
 def download(job_id):
     """Download converted file"""
-    if job_id not in conversion_jobs:
+    job = get_job(job_id)
+    if job is None:
         return jsonify({'error': 'Job not found'}), 404
 
-    job = conversion_jobs[job_id]
     if job['status'] != 'completed' or 'output_path' not in job:
         return jsonify({'error': 'File not ready'}), 400
 
@@ -260,46 +775,61 @@ def download(job_id):
     # Remove job ID from filename for cleaner download
     clean_filename = '_'.join(filename.split('_')[1:])
 
-    return send_file(output_path, as_attachment=True, download_name=clean_filename)
+    response = send_file(output_path, as_attachment=True, download_name=clean_filename, conditional=True)
+
+    # Not-modified responses carry no X-Sendfile and must stay bodiless
+    if X_ACCEL_REDIRECT_PREFIX and response.headers.pop('X-Sendfile', None):
+        response.headers['X-Accel-Redirect'] = f"{X_ACCEL_REDIRECT_PREFIX}{quote(filename)}"
+
+    return response
 
 
 @app.route('/formats')
 def get_formats():
     """Get supported audio formats with details"""
-    format_details = {
-        'mp3': {'name': 'MP3', 'description': 'Most compatible format'},
-        'ogg': {'name': 'OGG Vorbis', 'description': 'Open format, great for games'},
-        'wav': {'name': 'WAV', 'description': 'Uncompressed, highest quality'},
-        'flac': {'name': 'FLAC', 'description': 'Lossless compression'},
-        'aac': {'name': 'AAC', 'description': 'Advanced audio coding'},
-        'm4a': {'name': 'M4A', 'description': 'Apple audio format'},
-        'opus': {'name': 'Opus', 'description': 'Modern, efficient codec'},
-        'wma': {'name': 'WMA', 'description': 'Windows Media Audio'}
-    }
-    return jsonify(format_details)
+    response = Response(FORMAT_DETAILS_JSON, mimetype='application/json')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@app.route('/config')
+def get_current_config():
+    """Get the current configuration"""
+    return Response(get_config_json(), mimetype='application/json')
 
 
 # Cleanup old files periodically
-def cleanup_old_files():
+def cleanup_folder(folder, cutoff):
+    """Remove files in folder that were last modified before cutoff"""
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+    except FileNotFoundError:
+        pass
+
+
+async def cleanup_old_files():
     """Remove old temporary and output files"""
-    import time
+    folders = ['temp', 'uploads', 'outputs', CACHE_FOLDER]
+    max_age = conversion_config.get('cleanup_after_hours', 24) * 3600
+
     while True:
-        time.sleep(3600)  # Run every hour
+        await asyncio.sleep(3600)  # Run every hour
 
-        # Clean files older than 24 hours
-        for folder in ['temp', 'uploads', 'outputs']:
-            for file in os.listdir(folder):
-                filepath = os.path.join(folder, file)
-                if os.path.getmtime(filepath) < time.time() - 86400:  # 24 hours
-                    try:
-                        os.remove(filepath)
-                    except:
-                        pass
+        # Folders are independent, so sweep them concurrently
+        cutoff = time.time() - max_age
+        await asyncio.gather(*(
+            conversion_loop.run_in_executor(None, cleanup_folder, folder, cutoff) for folder in folders
+        ))
 
 
-# Start cleanup thread
-cleanup_thread = threading.Thread(target=cleanup_old_files, daemon=True)
-cleanup_thread.start()
+# Start cleanup task
+asyncio.run_coroutine_threadsafe(cleanup_old_files(), conversion_loop)
 
 if __name__ == '__main__':
     # Use configuration settings if available
@@ -307,6 +837,6 @@ if __name__ == '__main__':
     app.run(
         host=server_config.get('host', '127.0.0.1'),
         port=server_config.get('port', 5000),
-        debug=server_config.get('debug', True),
+        debug=server_config.get('debug', False),
         threaded=server_config.get('threaded', True)
     )
\ No newline at end of file
@@ -7,9 +7,13 @@ A standalone audio converter with YouTube download support
 import sys
 import subprocess
 import os
+import re
 import json
+import shutil
+import tempfile
 import threading
 import queue
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 
@@ -24,6 +28,144 @@ import ffmpeg
 
 from ffmpeg._run import Error as FFmpegError
 
+# In-process conversion through PyAV is optional; fall back to the ffmpeg CLI
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SETTINGS_FILE = 'settings.json'
+DEFAULT_OUTPUT_DIR = str(Path.home() / "Downloads" / "AudioConverter")
+
+# Pipe buffer for ffmpeg's stderr, which carries the -progress report
+FFMPEG_PIPE_BUFFER_SIZE = 1024 * 1024
+
+# key=value lines written by ffmpeg -progress; everything else is kept for error messages
+FFMPEG_PROGRESS_LINE_RE = re.compile(rb'^\w+=\S*$')
+
+# Anchored so local paths bail out on the first characters and look-alike hosts don't match
+YOUTUBE_URL_RE = re.compile(r'^(?:https?://)?(?:www\.|m\.|music\.)?(?:youtube\.com|youtu\.be)/', re.IGNORECASE)
+
+# Anything other than letters, digits, spaces, dashes and underscores is dropped from titles
+UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^\w \-]+')
+
+# Encoder used for each output format
+CODEC_MAP = {
+    'mp3': 'libmp3lame',
+    'ogg': 'libvorbis',
+    'wav': 'pcm_s16le',
+    'flac': 'flac',
+    'aac': 'aac',
+    'm4a': 'aac',
+    'opus': 'libopus',
+    'wma': 'wmav2'
+}
+
+# Codec name reported by ffprobe for each encoder we use
+ENCODER_CODEC_NAMES = {
+    'libmp3lame': 'mp3',
+    'libvorbis': 'vorbis',
+    'pcm_s16le': 'pcm_s16le',
+    'flac': 'flac',
+    'aac': 'aac',
+    'libopus': 'opus',
+    'wmav2': 'wmav2'
+}
+
+# Choices offered by the settings combo boxes
+FORMAT_OPTIONS = ('mp3', 'ogg', 'wav', 'flac', 'aac', 'm4a', 'opus', 'wma')
+SAMPLE_RATE_OPTIONS = ('Original', '22050 Hz', '32000 Hz', '44100 Hz', '48000 Hz', '96000 Hz')
+BITRATE_OPTIONS = ('Auto', '64k', '96k', '128k', '192k', '256k', '320k')
+
+# QStringListModels for the option lists, created once a QApplication exists
+option_models = {}
+
+
+def get_option_model(options):
+    """Return the shared list model for a tuple of combo box options"""
+    model = option_models.get(options)
+    if model is None:
+        model = QStringListModel(list(options), QApplication.instance())
+        option_models[options] = model
+    return model
+
+
+# Settings applied by the preset buttons
+PRESETS = {
+    'hoi4': {
+        'format': 'ogg',
+        'sample_rate': '32000 Hz',
+        'bitrate': '128k'
+    },
+    'hq': {
+        'format': 'flac',
+        'sample_rate': 'Original',
+        'bitrate': 'Auto'
+    },
+    'compressed': {
+        'format': 'mp3',
+        'sample_rate': '44100 Hz',
+        'bitrate': '128k'
+    }
+}
+
+# Extensions accepted from drag-and-drop and the file browser
+AUDIO_EXTENSIONS = frozenset({'.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac', '.wma', '.opus'})
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mkv'})
+MEDIA_EXTENSIONS = AUDIO_EXTENSIONS | VIDEO_EXTENSIONS
+
+FILE_DIALOG_FILTER = (
+    f"Audio Files ({' '.join('*' + ext for ext in sorted(AUDIO_EXTENSIONS))});;"
+    f"Video Files ({' '.join('*' + ext for ext in sorted(VIDEO_EXTENSIONS))});;"
+    "All Files (*.*)"
+)
+
+
+class SharedYoutubeDL:
+    """One YoutubeDL reused by every conversion thread instead of one per URL"""
+
+    def __init__(self):
+        self._ydl = None
+        self._hook = None
+        # yt-dlp isn't thread-safe, so downloads run one at a time; conversions still overlap
+        self._lock = threading.Lock()
+
+    def _progress_hook(self, d):
+        """Forward progress to the thread that is currently downloading"""
+        if self._hook is not None:
+            self._hook(d)
+
+    def download(self, url, outtmpl, progress_hook, cancel_event):
+        """Download url using the output template and return (info, file path)"""
+        with self._lock:
+            # The job may have been cancelled while it waited for another download
+            if cancel_event.is_set():
+                raise yt_dlp.utils.DownloadCancelled()
+
+            if self._ydl is None:
+                self._ydl = yt_dlp.YoutubeDL({
+                    'format': 'bestaudio/best',
+                    'quiet': True,
+                    'no_warnings': True,
+                    'progress_hooks': [self._progress_hook],
+                })
+
+            self._ydl.params['outtmpl'] = {'default': outtmpl}
+            self._hook = progress_hook
+            try:
+                info = self._ydl.extract_info(url, download=True)
+                return info, self._ydl.prepare_filename(info)
+            finally:
+                self._hook = None
+
+
+shared_youtube_dl = SharedYoutubeDL()
+
 
 class ConversionThread(QThread):
     """Thread for handling audio conversion"""
@@ -38,48 +180,75 @@ class ConversionThread(QThread):
         self.settings = settings
         self.is_youtube = self._is_youtube_url(source)
 
+        # Set by cancel(); checked by the download hook and the conversion loops
+        self._cancel = threading.Event()
+        self._proc = None
+
+    def cancel(self):
+        """Ask the thread to stop and terminate a running ffmpeg process"""
+        self._cancel.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def kill_process(self):
+        """Kill a running ffmpeg process that ignored cancel()"""
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
     def _is_youtube_url(self, url):
         """Check if URL is from YouTube"""
-        return isinstance(url, str) and ('youtube.com' in url or 'youtu.be' in url)
+        return isinstance(url, str) and YOUTUBE_URL_RE.match(url) is not None
 
-    def _download_youtube(self, url):
-        """Download audio from YouTube"""
+    def _download_youtube(self, url, download_dir):
+        """Download audio from YouTube in its native container (no intermediate re-encode)"""
         self.progress.emit(10, "Connecting to YouTube...")
 
-        output_path = os.path.join(self.output_dir, 'youtube_temp_%(title)s.%(ext)s')
-
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': output_path,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '320',
-            }],
-            'quiet': True,
-            'no_warnings': True,
-            'progress_hooks': [self._youtube_progress_hook],
-        }
+        output_path = os.path.join(download_dir, '%(title)s.%(ext)s')
+
+        # Progress scale follows the reported size, see _youtube_progress_hook
+        self._progress_total = None
+        self._progress_scale = 0.0
+        self._last_progress = -1
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                self.progress.emit(20, "Downloading audio...")
-                info = ydl.extract_info(url, download=True)
-                title = info.get('title', 'Unknown')
+            self.progress.emit(20, "Downloading audio...")
+            info, downloaded = shared_youtube_dl.download(url, output_path, self._youtube_progress_hook, self._cancel)
+            title = info.get('title', 'Unknown')
+
+            # yt-dlp already knows where it wrote the file
+            if os.path.exists(downloaded):
+                return downloaded, title
 
-                # Find the downloaded file
-                for file in os.listdir(self.output_dir):
-                    if file.startswith('youtube_temp_') and file.endswith('.mp3'):
-                        return os.path.join(self.output_dir, file), title
+            # Fall back to the download directory, which only holds this job's file
+            with os.scandir(download_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.part'):
+                        return entry.path, title
 
         except Exception as e:
             raise Exception(f"YouTube download failed: {str(e)}")
 
     def _youtube_progress_hook(self, d):
         """Handle YouTube download progress"""
+        if self._cancel.is_set():
+            raise yt_dlp.utils.DownloadCancelled()
+
         if d['status'] == 'downloading':
-            percent = d.get('downloaded_bytes', 0) / d.get('total_bytes', 1) * 50
-            self.progress.emit(int(20 + percent), f"Downloading... {int(percent * 2)}%")
+            # total_bytes is None for streams of unknown size, and the estimate is
+            # revised as fragments arrive; only redo the division when it changes
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            if total != self._progress_total:
+                self._progress_total = total
+                self._progress_scale = 50.0 / total if total else 0.0
+
+            percent = min(int(d.get('downloaded_bytes', 0) * self._progress_scale), 50)
+
+            # Only signal the GUI thread when the displayed value changes
+            if percent != self._last_progress:
+                self._last_progress = percent
+                self.progress.emit(20 + percent, f"Downloading... {percent * 2}%")
 
     def _convert_audio(self, input_path, title=None):
         """Convert audio file"""
@@ -87,30 +256,48 @@ class ConversionThread(QThread):
 
         # Determine output filename
         if title:
-            base_name = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+            base_name = UNSAFE_FILENAME_CHARS_RE.sub('', title).rstrip()
         else:
             base_name = Path(input_path).stem
 
         output_filename = f"{base_name}.{self.output_format}"
-        output_path = os.path.join(self.output_dir, output_filename)
 
-        # Prevent overwriting
+        # Prevent overwriting; read the directory once instead of a stat per candidate.
+        # Names are compared case-insensitively, as Windows and macOS filesystems do
+        with os.scandir(self.output_dir) as entries:
+            existing = {entry.name.casefold() for entry in entries}
+
         counter = 1
-        while os.path.exists(output_path):
+        while output_filename.casefold() in existing:
             output_filename = f"{base_name}_{counter}.{self.output_format}"
-            output_path = os.path.join(self.output_dir, output_filename)
             counter += 1
 
+        output_path = os.path.join(self.output_dir, output_filename)
+
+        # Audio parameters based on format and settings. The input is only probed when it
+        # might be remuxed as-is or when the ffmpeg CLI needs its duration for progress
+        audio_params = self._get_audio_params()
+        probe = None
+        if set(audio_params) == {'acodec'}:
+            probe = self._probe(input_path)
+            if self._can_stream_copy(probe, audio_params):
+                audio_params = {'acodec': 'copy', 'vn': None}
+
         try:
-            # Build ffmpeg command
-            stream = ffmpeg.input(input_path)
+            converted = False
+            if av is not None and audio_params['acodec'] != 'copy':
+                converted = self._convert_with_av(input_path, output_path, audio_params)
 
-            # Audio parameters based on format and settings
-            audio_params = self._get_audio_params()
+            if not converted:
+                # Stream copy, no PyAV, or an encoder that can't take the input's layout;
+                # the ffmpeg CLI negotiates formats itself
+                if probe is None:
+                    probe = self._probe(input_path)
 
-            # Apply parameters and convert
-            stream = ffmpeg.output(stream, output_path, **audio_params)
-            ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+                # Build ffmpeg command, apply parameters and convert
+                stream = ffmpeg.input(input_path)
+                stream = ffmpeg.output(stream, output_path, **audio_params)
+                self._run_ffmpeg(stream, self._get_duration(probe))
 
             self.progress.emit(90, "Finalizing...")
             return output_path
@@ -119,23 +306,161 @@ class ConversionThread(QThread):
             error_msg = e.stderr.decode() if e.stderr else str(e)
             raise Exception(f"Conversion failed: {error_msg}")
 
+    def _run_ffmpeg(self, stream, duration):
+        """Run ffmpeg as a child process that cancel() can terminate, reporting its progress"""
+        stream = stream.global_args('-progress', 'pipe:2', '-nostats')
+        self._proc = subprocess.Popen(
+            ffmpeg.compile(stream, overwrite_output=True),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            bufsize=FFMPEG_PIPE_BUFFER_SIZE
+        )
+
+        # cancel() may have run before the process existed
+        if self._cancel.is_set():
+            self._proc.terminate()
+
+        # Conversion covers 70-90% of the bar; out_time_us is in microseconds
+        scale = 20 / (duration * 1e6) if duration else 0.0
+        last_progress = -1
+        error_lines = deque(maxlen=200)
+
+        for line in self._proc.stderr:
+            line = line.rstrip()
+            if not FFMPEG_PROGRESS_LINE_RE.match(line):
+                error_lines.append(line)
+            elif scale and line.startswith(b'out_time_us='):
+                try:
+                    progress = min(int(int(line[12:]) * scale), 20)
+                except ValueError:
+                    continue
+                if progress != last_progress:
+                    last_progress = progress
+                    self.progress.emit(70 + progress, "Converting audio...")
+
+        self._proc.wait()
+        if self._cancel.is_set():
+            raise Exception("Conversion cancelled")
+        if self._proc.returncode:
+            raise FFmpegError('ffmpeg', b'', b'\n'.join(error_lines))
+
+    def _probe(self, input_path):
+        """Probe the input once for its streams and duration, in ffprobe's layout"""
+        if av is not None:
+            # Reading the header in-process avoids spawning ffprobe
+            try:
+                with av.open(input_path) as container:
+                    # canonical_name is the format ("mp3"), not the decoder ("mp3float")
+                    streams = [{'codec_type': 'audio', 'codec_name': stream.codec_context.codec.canonical_name}
+                               for stream in container.streams.audio]
+                    probe = {'streams': streams}
+                    if container.duration:
+                        probe['format'] = {'duration': container.duration / av.time_base}
+                    return probe
+            except (av.error.FFmpegError, OSError):
+                return {}
+
+        try:
+            return ffmpeg.probe(input_path)
+        except (FFmpegError, OSError):
+            # OSError covers a missing ffprobe binary; conversion can go on without the probe
+            return {}
+
+    @staticmethod
+    def _get_duration(probe):
+        """Input duration in seconds, or 0 if unknown"""
+        try:
+            return float(probe['format']['duration'])
+        except (KeyError, ValueError):
+            return 0.0
+
+    def _can_stream_copy(self, probe, audio_params):
+        """Check whether the input already uses the target codec and can just be remuxed"""
+        # Any resampling, bitrate or channel change needs a real encode
+        if set(audio_params) != {'acodec'}:
+            return False
+
+        for stream in probe.get('streams', []):
+            if stream.get('codec_type') == 'audio':
+                return stream.get('codec_name') == ENCODER_CODEC_NAMES.get(audio_params['acodec'])
+        return False
+
+    def _convert_with_av(self, input_path, output_path, audio_params):
+        """Convert audio in-process with PyAV instead of spawning ffmpeg; False if the encoder can't be set up"""
+        try:
+            with av.open(input_path) as in_container, av.open(output_path, 'w') as out_container:
+                in_stream = in_container.streams.audio[0]
+
+                # Use the closest sample rate the encoder supports (libopus only takes 8-48 kHz
+                # steps, MP3 tops out at 48 kHz), as ffmpeg's format negotiation would
+                rate = audio_params.get('ar') or in_stream.rate
+                try:
+                    supported_rates = av.codec.Codec(audio_params['acodec'], 'w').audio_rates
+                except av.codec.codec.UnknownCodecError:
+                    # This PyAV build lacks the encoder (e.g. libvorbis); the ffmpeg CLI may have it
+                    return False
+                if supported_rates and rate not in supported_rates:
+                    rate = min(supported_rates, key=lambda supported: abs(supported - rate))
+
+                out_stream = out_container.add_stream(audio_params['acodec'], rate=rate)
+                # WAV inputs often report an unordered "2 channels" layout that
+                # encoders reject, so name mono/stereo explicitly
+                channels = audio_params.get('ac') or in_stream.codec_context.channels
+                if channels == 1:
+                    out_stream.codec_context.layout = 'mono'
+                elif channels == 2:
+                    out_stream.codec_context.layout = 'stereo'
+                else:
+                    out_stream.codec_context.layout = in_stream.codec_context.layout.name
+
+                # PyAV defaults to 128k; leave the encoder's own default unless a bitrate was chosen
+                if audio_params.get('audio_bitrate'):
+                    out_stream.bit_rate = self._parse_bitrate(audio_params['audio_bitrate'])
+                else:
+                    out_stream.bit_rate = 0
+
+                # Open the encoder up front so an unsupported layout (e.g. 5.1 into MP3)
+                # can fall back to the ffmpeg CLI before anything is decoded
+                try:
+                    out_stream.codec_context.open()
+                except av.error.FFmpegError:
+                    return False
+
+                # Conversion covers 70-90% of the bar, as with the ffmpeg CLI
+                duration = in_container.duration / av.time_base if in_container.duration else 0
+                scale = 20 / duration if duration else 0.0
+                last_progress = -1
+
+                # Packets are muxed as they're encoded; the encoder resamples
+                # and re-chunks frames to suit the output codec
+                for frame in in_container.decode(in_stream):
+                    if self._cancel.is_set():
+                        raise Exception("Conversion cancelled")
+                    if scale and frame.time is not None:
+                        progress = min(int(frame.time * scale), 20)
+                        if progress != last_progress:
+                            last_progress = progress
+                            self.progress.emit(70 + progress, "Converting audio...")
+                    frame.pts = None
+                    out_container.mux(out_stream.encode(frame))
+
+                # Flush the encoder
+                out_container.mux(out_stream.encode(None))
+
+        except av.error.FFmpegError as e:
+            raise Exception(f"Conversion failed: {e}")
+        return True
+
+    @staticmethod
+    def _parse_bitrate(bitrate):
+        """Convert a bitrate like '128k' to bits per second"""
+        if bitrate.lower().endswith('k'):
+            return int(float(bitrate[:-1]) * 1000)
+        return int(bitrate)
+
     def _get_audio_params(self):
         """Get audio parameters based on settings"""
-        params = {}
-
-        # Codec mapping
-        codec_map = {
-            'mp3': 'libmp3lame',
-            'ogg': 'libvorbis',
-            'wav': 'pcm_s16le',
-            'flac': 'flac',
-            'aac': 'aac',
-            'm4a': 'aac',
-            'opus': 'libopus',
-            'wma': 'wmav2'
-        }
-
-        params['acodec'] = codec_map.get(self.output_format, 'copy')
+        params = {'acodec': CODEC_MAP.get(self.output_format, 'copy')}
 
         # Apply quality settings
         if self.settings.get('sample_rate'):
@@ -151,12 +476,13 @@ class ConversionThread(QThread):
 
     def run(self):
         """Run the conversion process"""
-        temp_file = None
+        temp_dir = None
 
         try:
             if self.is_youtube:
-                # Download from YouTube first
-                temp_file, title = self._download_youtube(self.source)
+                # Download from YouTube first, into a directory no other thread uses
+                temp_dir = tempfile.mkdtemp(prefix='actmp_')
+                temp_file, title = self._download_youtube(self.source, temp_dir)
                 output_path = self._convert_audio(temp_file, title)
             else:
                 # Convert local file
@@ -169,12 +495,159 @@ class ConversionThread(QThread):
             self.finished.emit(False, str(e))
 
         finally:
-            # Cleanup temporary file
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
+            # Cleanup the download directory
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class SettingsWriter(QRunnable):
+    """Write serialized settings to disk from the thread pool"""
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+
+    def run(self):
+        # Write to a temp file and swap it in so a crash never leaves a truncated file
+        tmp_path = SETTINGS_FILE + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.data)
+            os.replace(tmp_path, SETTINGS_FILE)
+        except OSError:
+            pass
+
+
+class QueueModel(QAbstractTableModel):
+    """Conversion queue stored as plain per-column lists instead of per-row widgets"""
+    HEADERS = ['File', 'Status', 'Progress', 'Action']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sources = []
+        self._names = []
+        self._statuses = []
+        self._progress = []
+        self._results = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._sources)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, column = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self._names[row]
+            if column == 1:
+                return self._statuses[row]
+            if column == 2:
+                return self._progress[row]
+            return "Open" if self._results[row] else "Remove"
+        if role == Qt.UserRole and column == 0:
+            return self._sources[row]
+        return None
+
+    def add(self, source, display_name):
+        """Append an item and return its row"""
+        self.add_many([(source, display_name)])
+        return len(self._sources) - 1
+
+    def add_many(self, items):
+        """Append (source, display_name) pairs with a single row insertion"""
+        if not items:
+            return
+
+        first = len(self._sources)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        for source, display_name in items:
+            self._sources.append(source)
+            self._names.append(display_name)
+        self._statuses.extend(["Queued"] * len(items))
+        self._progress.extend([0] * len(items))
+        self._results.extend([None] * len(items))
+        self.endInsertRows()
+
+    def remove(self, row):
+        """Remove the item at row"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        for column in (self._sources, self._names, self._statuses, self._progress, self._results):
+            del column[row]
+        self.endRemoveRows()
+
+    def clear(self):
+        """Remove every item"""
+        self.beginResetModel()
+        for column in (self._sources, self._names, self._statuses, self._progress, self._results):
+            column.clear()
+        self.endResetModel()
+
+    def source(self, row):
+        return self._sources[row]
+
+    def display_name(self, row):
+        return self._names[row]
+
+    def result(self, row):
+        return self._results[row]
+
+    def set_status(self, row, status, progress=None):
+        """Update the status text and optionally the progress of a row"""
+        self._statuses[row] = status
+        last_column = 1
+        if progress is not None:
+            self._progress[row] = progress
+            last_column = 2
+        self.dataChanged.emit(self.index(row, 1), self.index(row, last_column))
+
+    def set_result(self, row, output_path):
+        """Remember the converted file so the action column offers to open it"""
+        self._results[row] = output_path
+        self.dataChanged.emit(self.index(row, 3), self.index(row, 3))
+
+
+class ProgressDelegate(QStyledItemDelegate):
+    """Paint a progress bar for the progress column without a QProgressBar per row"""
+
+    def paint(self, painter, option, index):
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = index.data() or 0
+        bar.text = f"{bar.progress}%"
+        bar.textVisible = True
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, bar, painter)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paint a push button for the action column and report clicks on it"""
+    clicked = pyqtSignal(QModelIndex)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data()
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and option.rect.contains(event.pos()):
+            self.clicked.emit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
 
 
 class AudioConverterGUI(QMainWindow):
@@ -183,6 +656,12 @@ class AudioConverterGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.conversion_threads = []
+        # Queue row of each thread, kept valid as rows above it are removed
+        self.thread_rows = {}
+        # Conversions waiting for a free worker, started in FIFO order
+        self.pending_conversions = deque()
+        self.running_conversions = 0
+        self.max_parallel_conversions = os.cpu_count() or 1
         self.init_ui()
         self.load_settings()
 
@@ -347,28 +826,28 @@ class AudioConverterGUI(QMainWindow):
         # Output format
         settings_layout.addWidget(QLabel("Output Format:"), 0, 0)
         self.format_combo = QComboBox()
-        self.format_combo.addItems(['mp3', 'ogg', 'wav', 'flac', 'aac', 'm4a', 'opus', 'wma'])
+        self.format_combo.setModel(get_option_model(FORMAT_OPTIONS))
         self.format_combo.setCurrentText('ogg')
         settings_layout.addWidget(self.format_combo, 0, 1)
 
         # Sample rate
         settings_layout.addWidget(QLabel("Sample Rate:"), 0, 2)
         self.sample_rate_combo = QComboBox()
-        self.sample_rate_combo.addItems(['Original', '22050 Hz', '32000 Hz', '44100 Hz', '48000 Hz', '96000 Hz'])
+        self.sample_rate_combo.setModel(get_option_model(SAMPLE_RATE_OPTIONS))
         self.sample_rate_combo.setCurrentText('32000 Hz')
         settings_layout.addWidget(self.sample_rate_combo, 0, 3)
 
         # Bitrate
         settings_layout.addWidget(QLabel("Bitrate:"), 1, 0)
         self.bitrate_combo = QComboBox()
-        self.bitrate_combo.addItems(['Auto', '64k', '96k', '128k', '192k', '256k', '320k'])
+        self.bitrate_combo.setModel(get_option_model(BITRATE_OPTIONS))
         self.bitrate_combo.setCurrentText('128k')
         settings_layout.addWidget(self.bitrate_combo, 1, 1)
 
         # Output folder
         settings_layout.addWidget(QLabel("Output Folder:"), 1, 2)
         self.output_path = QLineEdit()
-        self.output_path.setText(str(Path.home() / "Downloads" / "AudioConverter"))
+        self.output_path.setText(DEFAULT_OUTPUT_DIR)
         settings_layout.addWidget(self.output_path, 1, 3)
 
         browse_output_btn = QPushButton("Browse")
@@ -417,10 +896,14 @@ class AudioConverterGUI(QMainWindow):
         queue_group = QGroupBox("Conversion Queue")
         queue_layout = QVBoxLayout()
 
-        # Queue table
-        self.queue_table = QTableWidget()
-        self.queue_table.setColumnCount(4)
-        self.queue_table.setHorizontalHeaderLabels(['File', 'Status', 'Progress', 'Action'])
+        # Queue table; progress bars and buttons are painted by delegates
+        self.queue_model = QueueModel(self)
+        self.queue_table = QTableView()
+        self.queue_table.setModel(self.queue_model)
+        self.queue_table.setItemDelegateForColumn(2, ProgressDelegate(self.queue_table))
+        self.queue_action_delegate = ButtonDelegate(self.queue_table)
+        self.queue_action_delegate.clicked.connect(self.queue_action_clicked)
+        self.queue_table.setItemDelegateForColumn(3, self.queue_action_delegate)
         self.queue_table.horizontalHeader().setStretchLastSection(False)
         self.queue_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.queue_table.setAlternatingRowColors(True)
@@ -501,7 +984,7 @@ class AudioConverterGUI(QMainWindow):
             if os.path.isfile(file):
                 # Check if it's an audio file
                 ext = os.path.splitext(file)[1].lower()
-                if ext in ['.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac', '.wma', '.opus', '.mp4', '.avi', '.mkv']:
+                if ext in MEDIA_EXTENSIONS:
                     item = QListWidgetItem(os.path.basename(file))
                     item.setData(Qt.UserRole, file)
                     self.drop_area.addItem(item)
@@ -512,7 +995,7 @@ class AudioConverterGUI(QMainWindow):
             self,
             "Select Audio Files",
             "",
-            "Audio Files (*.mp3 *.wav *.flac *.ogg *.m4a *.aac *.wma *.opus);;Video Files (*.mp4 *.avi *.mkv);;All Files (*.*)"
+            FILE_DIALOG_FILTER
         )
         if files:
             self.add_files_to_list(files)
@@ -532,26 +1015,8 @@ class AudioConverterGUI(QMainWindow):
 
     def apply_preset(self, preset):
         """Apply conversion preset"""
-        presets = {
-            'hoi4': {
-                'format': 'ogg',
-                'sample_rate': '32000 Hz',
-                'bitrate': '128k'
-            },
-            'hq': {
-                'format': 'flac',
-                'sample_rate': 'Original',
-                'bitrate': 'Auto'
-            },
-            'compressed': {
-                'format': 'mp3',
-                'sample_rate': '44100 Hz',
-                'bitrate': '128k'
-            }
-        }
-
-        if preset in presets:
-            settings = presets[preset]
+        if preset in PRESETS:
+            settings = PRESETS[preset]
             self.format_combo.setCurrentText(settings['format'])
             self.sample_rate_combo.setCurrentText(settings['sample_rate'])
             self.bitrate_combo.setCurrentText(settings['bitrate'])
@@ -567,33 +1032,19 @@ class AudioConverterGUI(QMainWindow):
 
     def add_to_queue(self, source, display_name):
         """Add item to conversion queue"""
-        row = self.queue_table.rowCount()
-        self.queue_table.insertRow(row)
-
-        # File name
-        self.queue_table.setItem(row, 0, QTableWidgetItem(display_name))
-
-        # Status
-        status_item = QTableWidgetItem("Queued")
-        self.queue_table.setItem(row, 1, status_item)
-
-        # Progress bar
-        progress = QProgressBar()
-        progress.setMinimum(0)
-        progress.setMaximum(100)
-        self.queue_table.setCellWidget(row, 2, progress)
-
-        # Action button
-        action_btn = QPushButton("Remove")
-        action_btn.clicked.connect(lambda: self.remove_from_queue(row))
-        self.queue_table.setCellWidget(row, 3, action_btn)
-
-        # Store source data
-        self.queue_table.item(row, 0).setData(Qt.UserRole, source)
+        self.queue_model.add(source, display_name)
 
     def remove_from_queue(self, row):
         """Remove item from queue"""
-        self.queue_table.removeRow(row)
+        self.queue_model.remove(row)
+
+    def queue_action_clicked(self, index):
+        """Open a finished item's folder or remove a pending one"""
+        result = self.queue_model.result(index.row())
+        if result:
+            self.open_file(result)
+        else:
+            self.remove_from_queue(index.row())
 
     def start_conversion(self):
         """Start the conversion process"""
@@ -607,11 +1058,13 @@ class AudioConverterGUI(QMainWindow):
                 sources.append((item.data(Qt.UserRole), item.text()))
 
         # Add items from queue table
-        for row in range(self.queue_table.rowCount()):
-            source = self.queue_table.item(row, 0).data(Qt.UserRole)
-            display_name = self.queue_table.item(row, 0).text()
+        queued = set()
+        for row in range(self.queue_model.rowCount()):
+            source = self.queue_model.source(row)
+            display_name = self.queue_model.display_name(row)
             if source:
                 sources.append((source, display_name))
+                queued.add(source)
 
         if not sources:
             QMessageBox.warning(self, "No Files", "Please add some files or URLs to convert.")
@@ -628,15 +1081,22 @@ class AudioConverterGUI(QMainWindow):
         self.drop_area.clear()
         self.update_drop_area_placeholder()
 
-        # Start conversion for each source
+        # Add new sources to the queue in one batch, repainting once at the end
+        new_items = []
         for source, display_name in sources:
-            if not any(item.data(Qt.UserRole) == source for row in range(self.queue_table.rowCount())
-                       for item in [self.queue_table.item(row, 0)] if item):
-                self.add_to_queue(source, display_name)
+            if source not in queued:
+                new_items.append((source, display_name))
+                queued.add(source)
+
+        self.queue_table.setUpdatesEnabled(False)
+        try:
+            self.queue_model.add_many(new_items)
+        finally:
+            self.queue_table.setUpdatesEnabled(True)
 
         # Process queue
-        for row in range(self.queue_table.rowCount()):
-            source = self.queue_table.item(row, 0).data(Qt.UserRole)
+        for row in range(self.queue_model.rowCount()):
+            source = self.queue_model.source(row)
             if source:
                 self.convert_file(row, source, self.format_combo.currentText(), output_dir, settings)
 
@@ -657,43 +1117,62 @@ class AudioConverterGUI(QMainWindow):
         return settings
 
     def convert_file(self, row, source, output_format, output_dir, settings):
-        """Convert a single file"""
-        # Update status
-        self.queue_table.item(row, 1).setText("Converting...")
-
+        """Queue a single file for conversion"""
         # Create conversion thread
         thread = ConversionThread(source, output_format, output_dir, settings)
 
-        # Connect signals
-        thread.progress.connect(lambda p, s: self.update_progress(row, p, s))
-        thread.finished.connect(lambda success, result: self.conversion_finished(row, success, result))
+        # Connect signals; the slots find the row through sender()
+        self.thread_rows[thread] = QPersistentModelIndex(self.queue_model.index(row, 0))
+        thread.progress.connect(self.update_progress)
+        thread.finished.connect(self.conversion_finished)
+        thread.finished.connect(self.worker_finished)
 
-        # Start conversion
-        thread.start()
+        # Start conversion once a worker is free
         self.conversion_threads.append(thread)
-
-    def update_progress(self, row, progress, status):
+        self.pending_conversions.append(thread)
+        self.start_pending_conversions()
+
+    def thread_row(self, thread):
+        """Current queue row of a conversion thread, or -1 if it was removed"""
+        index = self.thread_rows.get(thread)
+        return index.row() if index is not None and index.isValid() else -1
+
+    def start_pending_conversions(self):
+        """Start queued conversions while fewer than one per CPU core are running"""
+        while self.pending_conversions and self.running_conversions < self.max_parallel_conversions:
+            thread = self.pending_conversions.popleft()
+            row = self.thread_row(thread)
+            if row >= 0:
+                self.queue_model.set_status(row, "Converting...")
+
+            self.running_conversions += 1
+            thread.start()
+
+    def worker_finished(self):
+        """Free a worker slot and start the next queued conversion"""
+        self.running_conversions -= 1
+        self.start_pending_conversions()
+
+    def update_progress(self, progress, status):
         """Update conversion progress"""
-        if row < self.queue_table.rowCount():
-            self.queue_table.item(row, 1).setText(status)
-            progress_bar = self.queue_table.cellWidget(row, 2)
-            if progress_bar:
-                progress_bar.setValue(progress)
+        row = self.thread_row(self.sender())
+        if row >= 0:
+            self.queue_model.set_status(row, status, progress)
 
-    def conversion_finished(self, row, success, result):
+    def conversion_finished(self, success, result):
         """Handle conversion completion"""
-        if row < self.queue_table.rowCount():
+        row = self.thread_row(self.sender())
+        self.thread_rows.pop(self.sender(), None)
+        if row >= 0:
             if success:
-                self.queue_table.item(row, 1).setText("✓ Completed")
+                self.queue_model.set_status(row, "✓ Completed")
 
                 # Change action button to "Open"
-                open_btn = QPushButton("Open")
-                open_btn.clicked.connect(lambda: self.open_file(result))
-                self.queue_table.setCellWidget(row, 3, open_btn)
+                self.queue_model.set_result(row, result)
 
                 self.status_bar.showMessage(f"Converted: {os.path.basename(result)}")
             else:
-                self.queue_table.item(row, 1).setText("✗ Failed")
+                self.queue_model.set_status(row, "✗ Failed")
                 QMessageBox.warning(self, "Conversion Failed", f"Error: {result}")
 
     def open_file(self, filepath):
@@ -707,7 +1186,7 @@ class AudioConverterGUI(QMainWindow):
 
     def clear_queue(self):
         """Clear the conversion queue"""
-        self.queue_table.setRowCount(0)
+        self.queue_model.clear()
 
     def show_about(self):
         """Show about dialog"""
@@ -731,35 +1210,48 @@ class AudioConverterGUI(QMainWindow):
             'bitrate': self.bitrate_combo.currentText()
         }
 
-        try:
-            with open('settings.json', 'w') as f:
-                json.dump(settings, f)
-        except:
-            pass
+        if orjson is not None:
+            data = orjson.dumps(settings)
+        else:
+            data = json.dumps(settings).encode('utf-8')
+
+        # The global pool is drained before the application exits
+        QThreadPool.globalInstance().start(SettingsWriter(data))
 
     def load_settings(self):
         """Load application settings"""
         try:
-            with open('settings.json', 'r') as f:
-                settings = json.load(f)
-
-            self.output_path.setText(settings.get('output_path', str(Path.home() / "Downloads" / "AudioConverter")))
+            with open(SETTINGS_FILE, 'rb') as f:
+                settings = json.loads(f.read())
+            if not isinstance(settings, dict):
+                return
+
+            # The widget already shows the default; only override it with a saved path
+            if settings.get('output_path'):
+                self.output_path.setText(settings['output_path'])
             self.format_combo.setCurrentText(settings.get('format', 'ogg'))
             self.sample_rate_combo.setCurrentText(settings.get('sample_rate', '32000 Hz'))
             self.bitrate_combo.setCurrentText(settings.get('bitrate', '128k'))
-        except:
-            # Use defaults
+        except (OSError, ValueError, TypeError):
+            # Missing, unreadable or malformed settings; use defaults
             pass
 
     def closeEvent(self, event):
         """Handle application close event"""
         self.save_settings()
 
-        # Stop all conversion threads
+        # Stop all conversion threads; queued ones never start
+        self.pending_conversions.clear()
         for thread in self.conversion_threads:
             if thread.isRunning():
-                thread.terminate()
-                thread.wait()
+                thread.cancel()
+
+        for thread in self.conversion_threads:
+            if not thread.wait(3000):
+                thread.kill_process()
+                # A download or in-process decode can't be killed; don't hang the exit on it
+                if not thread.wait(2000):
+                    print(f"Conversion of {thread.source} did not stop, abandoning it", file=sys.stderr)
 
         event.accept()
 
@@ -6,11 +6,37 @@ Creates a standalone .exe file with all dependencies bundled
 
 import os
 import sys
+import json
 import shutil
 import subprocess
+import tempfile
 import zipfile
 import requests
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# libarchive inflates in native code without holding the GIL; zipfile is the fallback
+try:
+    import libarchive
+except ImportError:
+    libarchive = None
+
+# Reading package metadata avoids importing heavy packages like yt_dlp (Python 3.8+);
+# PackageNotFoundError subclasses ImportError, so both checks fail the same way
+try:
+    from importlib.metadata import distribution
+except ImportError:
+    distribution = None
+
+# Read/write block size for the FFmpeg download and extraction
+CHUNK_SIZE = 1024 * 1024
+
+# Times an interrupted FFmpeg download is resumed before giving up
+DOWNLOAD_ATTEMPTS = 5
+
+# Members of the FFmpeg archive that get bundled
+FFMPEG_EXECUTABLES = ('ffmpeg.exe', 'ffprobe.exe')
 
 
 def print_step(message):
@@ -41,7 +67,10 @@ def check_requirements():
     missing_packages = []
     for module, package in required_packages.items():
         try:
-            __import__(module)
+            if distribution is not None:
+                distribution(package)
+            else:
+                __import__(module)
             print(f"✓ {package} is installed")
         except ImportError:
             print(f"❌ {package} is not installed")
@@ -55,54 +84,123 @@ def check_requirements():
     return True
 
 
+def download_to(session, url, archive):
+    """Download url into archive, resuming with a Range request if the connection drops"""
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        offset = archive.tell()
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        try:
+            with session.get(url, stream=True, headers=headers, timeout=30) as response:
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    # The server ignored the range; start over
+                    archive.seek(0)
+                    archive.truncate()
+
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    archive.write(chunk)
+            return
+
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == DOWNLOAD_ATTEMPTS:
+                raise
+            print(f"⚠ Download interrupted ({e}), resuming at {archive.tell() // (1024 * 1024)} MB...")
+
+
+def extract_ffmpeg(archive, ffmpeg_dir):
+    """Copy the FFmpeg executables out of the downloaded archive"""
+    # Each executable is written next to its final path and then swapped in, so an interrupted
+    # build never leaves a truncated binary that passes the "already present" check
+    archive.seek(0)
+
+    if libarchive is not None:
+        with libarchive.stream_reader(archive) as reader:
+            for entry in reader:
+                name = entry.pathname.rsplit('/', 1)[-1]
+                if name in FFMPEG_EXECUTABLES:
+                    part_path = ffmpeg_dir / (name + '.part')
+                    with open(part_path, 'wb') as dst:
+                        for block in entry.get_blocks():
+                            dst.write(block)
+                    os.replace(part_path, ffmpeg_dir / name)
+        return
+
+    with zipfile.ZipFile(archive, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            name = info.filename.rsplit('/', 1)[-1]
+            if name in FFMPEG_EXECUTABLES:
+                part_path = ffmpeg_dir / (name + '.part')
+                with zip_ref.open(info) as src, open(part_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                os.replace(part_path, ffmpeg_dir / name)
+
+
 def download_ffmpeg():
     """Download FFmpeg binaries for Windows"""
     print_step("Downloading FFmpeg binaries")
 
     ffmpeg_dir = Path("ffmpeg_bin")
     ffmpeg_dir.mkdir(exist_ok=True)
+    manifest_path = ffmpeg_dir / ".manifest.json"
 
-    # Check if already downloaded
-    if (ffmpeg_dir / "ffmpeg.exe").exists() and (ffmpeg_dir / "ffprobe.exe").exists():
+    # Binaries placed by hand have no manifest and are used as-is
+    binaries_present = all((ffmpeg_dir / name).exists() for name in FFMPEG_EXECUTABLES)
+    if binaries_present and not manifest_path.exists():
         print("✓ FFmpeg binaries already present")
         return True
 
-    print("Downloading FFmpeg for Windows...")
-
     # Download FFmpeg (using a reliable source)
     ffmpeg_url = "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip"
 
     try:
-        # Download the zip file
-        response = requests.get(ffmpeg_url, stream=True)
-        response.raise_for_status()
-
-        zip_path = ffmpeg_dir / "ffmpeg.zip"
-        with open(zip_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        print("✓ Downloaded FFmpeg archive")
-
-        # Extract the required executables
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for file in zip_ref.namelist():
-                if file.endswith('ffmpeg.exe') or file.endswith('ffprobe.exe'):
-                    # Extract to temp location
-                    zip_ref.extract(file, ffmpeg_dir / "temp")
-                    # Move to main directory
-                    extracted_path = ffmpeg_dir / "temp" / file
-                    target_path = ffmpeg_dir / os.path.basename(file)
-                    shutil.move(str(extracted_path), str(target_path))
-
-        # Cleanup
-        zip_path.unlink()
-        shutil.rmtree(ffmpeg_dir / "temp", ignore_errors=True)
-
+        # Retry failed connections and 5xx responses with backoff, reusing one keep-alive session
+        session = requests.Session()
+        retries = Retry(total=5, backoff_factor=1, status_forcelist=[502, 503, 504])
+        session.mount('https://', HTTPAdapter(max_retries=retries))
+
+        with session:
+            # Compare the release against the one we extracted last time before fetching ~100 MB.
+            # Some hosts reject HEAD, so a failure here only means we can't skip the download
+            try:
+                head = session.head(ffmpeg_url, allow_redirects=True, timeout=30)
+                head.raise_for_status()
+                remote = {'etag': head.headers.get('ETag'), 'size': head.headers.get('Content-Length')}
+            except requests.RequestException as e:
+                print(f"⚠ Could not check the latest FFmpeg release ({e}), downloading it anyway")
+                remote = {'etag': None, 'size': None}
+
+            if binaries_present:
+                try:
+                    cached = json.loads(manifest_path.read_text())
+                except (OSError, ValueError):
+                    cached = None
+                if remote['etag'] and cached == remote:
+                    print("✓ FFmpeg binaries already present and up to date")
+                    return True
+
+            print("Downloading FFmpeg for Windows...")
+
+            # Keep the archive in memory, spilling to a temp file only if it grows past 64 MB.
+            # Before Python 3.11 SpooledTemporaryFile lacks seekable(), which zipfile needs
+            if sys.version_info >= (3, 11):
+                archive_file = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+            else:
+                archive_file = tempfile.TemporaryFile()
+            with archive_file as archive:
+                download_to(session, ffmpeg_url, archive)
+
+                print("✓ Downloaded FFmpeg archive")
+
+                extract_ffmpeg(archive, ffmpeg_dir)
+
+        manifest_path.write_text(json.dumps(remote))
         print("✓ Extracted FFmpeg executables")
         return True
 
     except Exception as e:
+        if binaries_present:
+            print(f"⚠ Could not update FFmpeg ({e}), keeping the existing binaries")
+            return True
         print(f"❌ Failed to download FFmpeg: {e}")
         print("\nPlease manually download FFmpeg and place ffmpeg.exe and ffprobe.exe in the 'ffmpeg_bin' folder")
         return False
@@ -130,6 +228,7 @@ a = Analysis(
         'yt_dlp.downloader',
         'yt_dlp.postprocessor',
         'ffmpeg',
+        'av',
         'PyQt5.QtCore',
         'PyQt5.QtGui',
         'PyQt5.QtWidgets'
@@ -231,15 +330,13 @@ def create_icon():
     try:
         from PIL import Image, ImageDraw
 
-        # Create a 256x256 icon
-        img = Image.new('RGBA', (256, 256), (0, 0, 0, 0))
+        # Create a 256x256 icon with a vertical gradient background; linear_gradient
+        # fills the ramp in C and point() maps it onto the red channel's range
+        size = (256, 256)
+        red = Image.linear_gradient('L').point(lambda v: 102 + (118 - 102) * v // 256)
+        img = Image.merge('RGBA', (red, Image.new('L', size, 126), Image.new('L', size, 234), Image.new('L', size, 255)))
         draw = ImageDraw.Draw(img)
 
-        # Draw a gradient background
-        for i in range(256):
-            color = int(102 + (118 - 102) * i / 256)
-            draw.rectangle([0, i, 256, i + 1], fill=(color, 126, 234, 255))
-
         # Draw a musical note symbol
         draw.ellipse([80, 100, 120, 140], fill='white')
         draw.rectangle([115, 60, 125, 140], fill='white')
@@ -294,15 +391,7 @@ def create_portable_package():
     """Create a portable package with the executable and required files"""
     print_step("Creating portable package")
 
-    # Create package directory
-    package_dir = Path("AudioConverterPro_Portable")
-    package_dir.mkdir(exist_ok=True)
-
-    # Copy executable
     exe_source = Path('dist') / 'AudioConverterPro.exe'
-    if exe_source.exists():
-        shutil.copy2(exe_source, package_dir / 'AudioConverterPro.exe')
-        print("✓ Copied executable")
 
     # Create README
     readme_content = """Audio Converter Pro - Portable Edition
@@ -325,16 +414,16 @@ The converted files will be saved to your Downloads/AudioConverter folder by def
 Enjoy!
 """
 
-    with open(package_dir / 'README.txt', 'w') as f:
-        f.write(readme_content)
-
-    print("✓ Created README.txt")
-
-    # Create a zip file
+    # Create a zip file straight from dist/ and the in-memory README, without a staging folder;
+    # the executable is already UPX-compressed, so store it as-is and only deflate the text
     zip_name = 'AudioConverterPro_Portable.zip'
-    with zipfile.ZipFile(zip_name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file in package_dir.iterdir():
-            zipf.write(file, file.name)
+    with zipfile.ZipFile(zip_name, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        if exe_source.exists():
+            zipf.write(exe_source, 'AudioConverterPro.exe', compress_type=zipfile.ZIP_STORED)
+            print("✓ Added executable")
+
+        zipf.writestr('README.txt', readme_content)
+        print("✓ Added README.txt")
 
     print(f"✓ Created portable package: {zip_name}")
 
@@ -7,130 +7,320 @@ Usage: python cli_converter.py [input] -f [format] -s [sample_rate] -b [bitrate]
 import os
 import sys
 import argparse
+import asyncio
+import fnmatch
 import glob
-from pathlib import Path
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 import yt_dlp
-import ffmpeg
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Files converted by one ffmpeg process in --fused mode
+FUSED_GROUP_SIZE = 16
+
+# YouTube downloads are network-bound, so more of them run at once than conversions
+MAX_PARALLEL_DOWNLOADS = 8
+
+# Leading ffmpeg arguments: quiet output, only errors on stderr, overwrite outputs
+FFMPEG_BASE_ARGS = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y']
+
+# URL prefixes treated as YouTube links, with and without a scheme
+YOUTUBE_HOSTS = ('www.youtube.com/', 'youtube.com/', 'm.youtube.com/', 'music.youtube.com/', 'youtu.be/')
+YOUTUBE_URL_PREFIXES = tuple(scheme + host for scheme in ('https://', 'http://', '') for host in YOUTUBE_HOSTS)
+
+# Output format -> (file extension, ffmpeg encoder)
+FORMATS = {
+    'mp3': ('mp3', 'libmp3lame'),
+    'ogg': ('ogg', 'libvorbis'),
+    'wav': ('wav', 'pcm_s16le'),
+    'flac': ('flac', 'flac'),
+    'aac': ('aac', 'aac'),
+    'm4a': ('m4a', 'aac'),
+    'opus': ('opus', 'libopus'),
+    'wma': ('wma', 'wmav2')
+}
+
+
+def expand_inputs(patterns):
+    """Expand wildcard patterns, listing each directory once, and drop duplicates keeping order"""
+    listings = {}
+    items = []
+    seen = set()
+
+    for pattern in patterns:
+        # URLs such as watch?v=... look like wildcards but are never globbed
+        if pattern.startswith(YOUTUBE_URL_PREFIXES):
+            matches = [pattern]
+        elif glob.has_magic(pattern):
+            directory, name_pattern = os.path.split(pattern)
+            if glob.has_magic(directory):
+                # Wildcards in the directory part need a real glob
+                matches = sorted(glob.glob(pattern))
+            else:
+                if directory not in listings:
+                    try:
+                        with os.scandir(directory or '.') as entries:
+                            listings[directory] = sorted(entry.name for entry in entries if entry.is_file())
+                    except OSError:
+                        listings[directory] = []
+                names = fnmatch.filter(listings[directory], name_pattern)
+                # Like glob, a wildcard doesn't match hidden files unless the pattern asks for them
+                if not name_pattern.startswith('.'):
+                    names = [name for name in names if not name.startswith('.')]
+                matches = [os.path.join(directory, name) for name in names]
+            # A literal name with brackets or similar (e.g. "song [live].mp3") isn't a pattern
+            if not matches and os.path.exists(pattern):
+                matches = [pattern]
+        else:
+            # It's a single file or URL
+            matches = [pattern]
+
+        for match in matches:
+            if match not in seen:
+                seen.add(match)
+                items.append(match)
+
+    return items
 
-class AudioConverter:
-    def __init__(self):
-        self.formats = {
-            'mp3': {'ext': 'mp3', 'codec': 'libmp3lame'},
-            'ogg': {'ext': 'ogg', 'codec': 'libvorbis'},
-            'wav': {'ext': 'wav', 'codec': 'pcm_s16le'},
-            'flac': {'ext': 'flac', 'codec': 'flac'},
-            'aac': {'ext': 'aac', 'codec': 'aac'},
-            'm4a': {'ext': 'm4a', 'codec': 'aac'},
-            'opus': {'ext': 'opus', 'codec': 'libopus'},
-            'wma': {'ext': 'wma', 'codec': 'wmav2'}
-        }
 
+class AudioConverter:
     def is_youtube_url(self, url):
         """Check if URL is a YouTube link"""
-        return 'youtube.com' in url or 'youtu.be' in url
+        return url.startswith(YOUTUBE_URL_PREFIXES)
 
-    def download_youtube(self, url, output_dir='downloads'):
-        """Download audio from YouTube"""
+    def download_youtube(self, url, output_dir='downloads', extract_mp3=True):
+        """Download audio from YouTube, as MP3 or in its native container"""
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, '%(title)s.%(ext)s')
 
         ydl_opts = {
             'format': 'bestaudio/best',
             'outtmpl': output_path,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '320',
-            }],
+            'postprocessors': [],
             'quiet': False,
             'no_warnings': False,
         }
 
+        if extract_mp3:
+            ydl_opts['postprocessors'].append({
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '320',
+            })
+
         print(f"Downloading: {url}")
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=True)
-                title = info.get('title', 'Unknown')
-                # Find the downloaded file
-                for file in os.listdir(output_dir):
-                    if title in file and file.endswith('.mp3'):
-                        return os.path.join(output_dir, file)
+
+                # yt-dlp reports the exact path it wrote; the MP3 postprocessor only swaps the extension
+                path = ydl.prepare_filename(info)
+                if extract_mp3:
+                    path = os.path.splitext(path)[0] + '.mp3'
+                return path
         except Exception as e:
             print(f"Error downloading {url}: {str(e)}")
             return None
 
     def convert_audio(self, input_path, output_format, sample_rate=None, bitrate=None, output_dir='converted'):
         """Convert audio file to specified format"""
-        if output_format not in self.formats:
-            raise ValueError(f"Unsupported format: {output_format}")
+        return asyncio.run(self.convert_audio_async(input_path, output_format, sample_rate, bitrate, output_dir))
 
-        os.makedirs(output_dir, exist_ok=True)
+    async def convert_audio_async(self, input_path, output_format, sample_rate=None, bitrate=None,
+                                  output_dir='converted', resolved=None):
+        """Convert audio file to specified format in an ffmpeg subprocess"""
+        ext, output_args = resolved or self.resolve_output(output_format, sample_rate, bitrate, output_dir)
 
-        format_info = self.formats[output_format]
-        output_filename = f"{Path(input_path).stem}.{format_info['ext']}"
+        input_name = os.path.basename(input_path)
+        output_filename = f"{os.path.splitext(input_name)[0]}.{ext}"
         output_path = os.path.join(output_dir, output_filename)
 
-        print(f"Converting: {os.path.basename(input_path)} -> {output_filename}")
+        print(f"Converting: {input_name} -> {output_filename}")
 
-        try:
-            # Build ffmpeg command
-            stream = ffmpeg.input(input_path)
+        # Build ffmpeg command
+        argv = FFMPEG_BASE_ARGS + ['-i', input_path] + output_args
+        argv.append(output_path)
+
+        # Run conversion
+        returncode, stderr = await self._run_ffmpeg(argv)
+
+        if returncode != 0:
+            error_message = stderr.decode(errors='replace')
+            print(f"✗ Error converting {input_name}: {error_message}")
+            return None
 
-            # Audio parameters
-            audio_params = {'acodec': format_info['codec']}
+        print(f"✓ Converted: {output_filename}")
+        return output_path
+
+    async def fused_convert_async(self, input_paths, output_format, sample_rate=None, bitrate=None,
+                                  output_dir='converted', resolved=None):
+        """Convert several local files with a single ffmpeg process"""
+        resolved = resolved or self.resolve_output(output_format, sample_rate, bitrate, output_dir)
+        ext, output_args = resolved
+
+        # One -i per input, each mapped to its own output
+        argv = list(FFMPEG_BASE_ARGS)
+        for input_path in input_paths:
+            argv += ['-i', input_path]
+
+        output_paths = []
+        for index, input_path in enumerate(input_paths):
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(output_dir, f"{stem}.{ext}")
+            output_paths.append(output_path)
+            argv += ['-map', f'{index}:a:0', *output_args, output_path]
+
+        print(f"Converting {len(input_paths)} file(s) in one ffmpeg process")
+        returncode, _ = await self._run_ffmpeg(argv)
+
+        if returncode != 0:
+            # One bad input fails the whole process; redo the group file by file
+            print("✗ Fused conversion failed, converting files individually")
+            results = []
+            for input_path in input_paths:
+                results.append(await self.convert_audio_async(input_path, output_format, sample_rate, bitrate,
+                                                              output_dir, resolved))
+            return results
 
-            if sample_rate:
-                audio_params['ar'] = sample_rate
+        for output_path in output_paths:
+            print(f"✓ Converted: {os.path.basename(output_path)}")
+        return output_paths
 
-            if bitrate:
-                audio_params['audio_bitrate'] = bitrate
+    @staticmethod
+    def resolve_output(output_format, sample_rate, bitrate, output_dir):
+        """Validate the format, create output_dir and return (extension, ffmpeg output arguments)"""
+        try:
+            ext, codec = FORMATS[output_format]
+        except KeyError:
+            raise ValueError(f"Unsupported format: {output_format}")
 
-            # Apply audio parameters
-            stream = ffmpeg.output(stream, output_path, **audio_params)
+        os.makedirs(output_dir, exist_ok=True)
 
-            # Run conversion
-            ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        output_args = ['-c:a', codec]
 
-            print(f"✓ Converted: {output_filename}")
-            return output_path
+        if sample_rate:
+            output_args += ['-ar', str(sample_rate)]
 
-        except ffmpeg.Error as e:
-            error_message = e.stderr.decode() if e.stderr else str(e)
-            print(f"✗ Error converting {os.path.basename(input_path)}: {error_message}")
-            return None
+        if bitrate:
+            output_args += ['-b:a', bitrate]
+
+        return ext, output_args
+
+    @staticmethod
+    async def _run_ffmpeg(argv):
+        """Run ffmpeg and return its exit code and stderr; the event loop waits on the process"""
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+        return proc.returncode, stderr
 
     def process_file(self, input_item, output_format, sample_rate, bitrate, output_dir):
         """Process a single file or URL"""
+        return asyncio.run(self.process_file_async(input_item, output_format, sample_rate, bitrate, output_dir))
+
+    async def process_file_async(self, input_item, output_format, sample_rate, bitrate, output_dir,
+                                 download_slots=None, convert_slots=None, resolved=None):
+        """Process a single file or URL, holding a download slot and a conversion slot only for each stage"""
+        download_slots = download_slots or asyncio.Semaphore(1)
+        convert_slots = convert_slots or asyncio.Semaphore(1)
+
         if self.is_youtube_url(input_item):
-            # Download from YouTube first
-            downloaded_file = self.download_youtube(input_item)
+            # yt-dlp's MP3 extraction is already the final encode when nothing else needs changing;
+            # otherwise fetch the native stream and encode it once
+            extract_mp3 = output_format == 'mp3' and not sample_rate and not bitrate
+
+            # Download from YouTube first; yt-dlp blocks, so run it off the event loop
+            loop = asyncio.get_running_loop()
+            async with download_slots:
+                downloaded_file = await loop.run_in_executor(None, self.download_youtube, input_item, 'downloads',
+                                                             extract_mp3)
+            if downloaded_file and extract_mp3:
+                # A batch has already created output_dir when resolving its settings
+                if resolved is None:
+                    os.makedirs(output_dir, exist_ok=True)
+                output_path = os.path.join(output_dir, os.path.basename(downloaded_file))
+                shutil.move(downloaded_file, output_path)
+                print(f"✓ Converted: {os.path.basename(output_path)}")
+                return output_path
+
             if downloaded_file:
-                result = self.convert_audio(downloaded_file, output_format, sample_rate, bitrate, output_dir)
+                async with convert_slots:
+                    result = await self.convert_audio_async(downloaded_file, output_format, sample_rate, bitrate,
+                                                            output_dir, resolved)
                 # Clean up downloaded file
                 os.remove(downloaded_file)
                 return result
         else:
             # Convert local file
-            return self.convert_audio(input_item, output_format, sample_rate, bitrate, output_dir)
+            async with convert_slots:
+                return await self.convert_audio_async(input_item, output_format, sample_rate, bitrate, output_dir,
+                                                      resolved)
 
     def batch_convert(self, input_items, output_format, sample_rate=None, bitrate=None, output_dir='converted',
-                      max_workers=4):
+                      max_workers=4, fused=False):
         """Convert multiple files in parallel"""
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = []
-            for item in input_items:
-                future = executor.submit(self.process_file, item, output_format, sample_rate, bitrate, output_dir)
-                futures.append(future)
-
-            results = []
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
-                    results.append(result)
+        return [result for _, result in self.batch_convert_iter(input_items, output_format, sample_rate, bitrate,
+                                                                output_dir, max_workers, fused) if result]
+
+    def batch_convert_iter(self, input_items, output_format, sample_rate=None, bitrate=None,
+                           output_dir='converted', max_workers=4, fused=False):
+        """Convert multiple files in parallel, yielding (item, result) pairs as they finish"""
+        loop = asyncio.new_event_loop()
+        results = self._batch_iter_async(input_items, output_format, sample_rate, bitrate, output_dir,
+                                         max_workers, fused)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def _batch_iter_async(self, input_items, output_format, sample_rate, bitrate, output_dir, max_workers,
+                                fused=False):
+        """Run up to max_workers ffmpeg processes at once and yield each result as it completes"""
+        # Downloads and conversions are separate stages: a stalled download doesn't hold a conversion slot
+        semaphore = asyncio.Semaphore(max_workers)
+        download_semaphore = asyncio.Semaphore(MAX_PARALLEL_DOWNLOADS)
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOWNLOADS))
+
+        # Validate the format, build the output arguments and create output_dir once for the whole batch
+        resolved = self.resolve_output(output_format, sample_rate, bitrate, output_dir)
+
+        async def process(item):
+            return [(item, await self.process_file_async(item, output_format, sample_rate, bitrate, output_dir,
+                                                         download_semaphore, semaphore, resolved))]
+
+        async def process_group(paths):
+            async with semaphore:
+                return list(zip(paths, await self.fused_convert_async(paths, output_format, sample_rate, bitrate,
+                                                                      output_dir, resolved)))
+
+        if fused:
+            # Local files share ffmpeg processes; YouTube items still go one by one
+            local_files = [item for item in input_items if not self.is_youtube_url(item)]
+            urls = [item for item in input_items if self.is_youtube_url(item)]
+            tasks = [process_group(local_files[i:i + FUSED_GROUP_SIZE])
+                     for i in range(0, len(local_files), FUSED_GROUP_SIZE)]
+            tasks += [process(url) for url in urls]
+        else:
+            tasks = [process(item) for item in input_items]
 
-            return results
+        tasks = [asyncio.ensure_future(task) for task in tasks]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for pair in await finished:
+                    yield pair
+        finally:
+            # The caller stopped early; don't leave conversions running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 
 def main():
@@ -151,6 +341,9 @@ Examples:
   # Use preset
   python cli_converter.py audio.wav --preset hoi4
 
+  # Convert many short clips with fewer ffmpeg processes
+  python cli_converter.py sfx/*.wav -f ogg --fused
+
 Supported formats: mp3, ogg, wav, flac, aac, m4a, opus, wma
         """
     )
@@ -162,6 +355,8 @@ Supported formats: mp3, ogg, wav, flac, aac, m4a, opus, wma
     parser.add_argument('-o', '--output-dir', default='converted', help='Output directory (default: converted)')
     parser.add_argument('--preset', choices=['hoi4', 'hq', 'compressed'], help='Use preset settings')
     parser.add_argument('-j', '--jobs', type=int, default=4, help='Number of parallel jobs (default: 4)')
+    parser.add_argument('--fused', action='store_true',
+                        help='Convert local files in groups with one ffmpeg process each (faster for many short clips)')
 
     args = parser.parse_args()
 
@@ -184,15 +379,7 @@ Supported formats: mp3, ogg, wav, flac, aac, m4a, opus, wma
             print("Using compressed preset: MP3 format, 44.1kHz, 128kbps")
 
     # Expand wildcards and collect all input items
-    input_items = []
-    for pattern in args.input:
-        if '*' in pattern or '?' in pattern:
-            # It's a wildcard pattern
-            files = glob.glob(pattern)
-            input_items.extend(files)
-        else:
-            # It's a single file or URL
-            input_items.append(pattern)
+    input_items = expand_inputs(args.input)
 
     if not input_items:
         print("No input files found!")
@@ -208,20 +395,26 @@ Supported formats: mp3, ogg, wav, flac, aac, m4a, opus, wma
 
     # Create converter and process files
     converter = AudioConverter()
-    results = converter.batch_convert(
+    total = len(input_items)
+    done = succeeded = 0
+    for _, result in converter.batch_convert_iter(
         input_items,
         args.format,
         args.sample_rate,
         args.bitrate,
         args.output_dir,
-        args.jobs
-    )
+        args.jobs,
+        args.fused
+    ):
+        done += 1
+        succeeded += bool(result)
+        print(f"[{done}/{total}] {succeeded} converted")
 
     print(f"\n{'=' * 50}")
-    print(f"Conversion complete! {len(results)}/{len(input_items)} files converted successfully.")
+    print(f"Conversion complete! {succeeded}/{total} files converted successfully.")
     print(f"Output directory: {os.path.abspath(args.output_dir)}")
 
-    return 0 if len(results) == len(input_items) else 1
+    return 0 if succeeded == total else 1
 
 
 if __name__ == '__main__':
@@ -3,13 +3,69 @@ Audio Converter Configuration File
 Customize these settings to match your needs
 """
 
+import os
+import json
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FormatSpec(NamedTuple):
+    """Output format settings"""
+    ext: str
+    codec: str
+    name: str
+    description: str
+    default_bitrate: Optional[str]
+    quality_options: Tuple[str, ...]
+
+
+class SampleRate(NamedTuple):
+    """Sample rate choice"""
+    value: Optional[int]
+    name: str
+
+
+class Preset(NamedTuple):
+    """Named conversion settings"""
+    name: str
+    format: str
+    sample_rate: Optional[int]
+    bitrate: Optional[str]
+    description: str
+
+
+class GameAudio(NamedTuple):
+    """Audio settings shared by a game's preset and game config"""
+    format: str
+    sample_rate: int
+    bitrate: str
+
+
+class GameConfig(NamedTuple):
+    """Audio requirements of a game"""
+    name: str
+    audio_format: str
+    sample_rate: int
+    channels: int
+    bitrate: str
+    notes: str
+
+
 # Server Configuration
 SERVER_CONFIG = {
     'host': '0.0.0.0',  # '0.0.0.0' allows external connections, '127.0.0.1' for localhost only
     'port': 5000,
-    'debug': True,  # Set to False in production
+    'debug': os.environ.get('FLASK_DEBUG', '0') == '1',  # Reloader and debugger, for development only
     'threaded': True,
     'max_content_length': 500 * 1024 * 1024,  # 500MB max upload size
+    'use_x_sendfile': False,  # Let Apache/lighttpd send downloads via X-Sendfile
+    'x_accel_redirect_prefix': None,  # nginx internal location for outputs, e.g. '/internal_outputs/'
 }
 
 # Directory Configuration
@@ -18,144 +74,149 @@ DIRECTORIES = {
     'output_folder': 'outputs',
     'temp_folder': 'temp',
     'youtube_folder': 'downloads',
+    'cache_folder': 'cache',  # Converted YouTube audio reused across jobs
 }
 
+# Bitrate choices shared by the lossy formats
+BITRATES_HIGH = ('96k', '128k', '192k', '256k', '320k')
+BITRATES_STANDARD = ('64k', '96k', '128k', '192k', '256k')
+
 # Audio Format Configuration
 AUDIO_FORMATS = {
-    'mp3': {
-        'ext': 'mp3',
-        'codec': 'libmp3lame',
-        'name': 'MP3',
-        'description': 'Most compatible format',
-        'default_bitrate': '192k',
-        'quality_options': ['96k', '128k', '192k', '256k', '320k']
-    },
-    'ogg': {
-        'ext': 'ogg',
-        'codec': 'libvorbis',
-        'name': 'OGG Vorbis',
-        'description': 'Open format, perfect for game modding',
-        'default_bitrate': '128k',
-        'quality_options': ['64k', '96k', '128k', '192k', '256k']
-    },
-    'wav': {
-        'ext': 'wav',
-        'codec': 'pcm_s16le',
-        'name': 'WAV',
-        'description': 'Uncompressed, highest quality',
-        'default_bitrate': None,
-        'quality_options': []
-    },
-    'flac': {
-        'ext': 'flac',
-        'codec': 'flac',
-        'name': 'FLAC',
-        'description': 'Lossless compression',
-        'default_bitrate': None,
-        'quality_options': []
-    },
-    'aac': {
-        'ext': 'aac',
-        'codec': 'aac',
-        'name': 'AAC',
-        'description': 'Advanced audio coding',
-        'default_bitrate': '192k',
-        'quality_options': ['96k', '128k', '192k', '256k', '320k']
-    },
-    'm4a': {
-        'ext': 'm4a',
-        'codec': 'aac',
-        'name': 'M4A',
-        'description': 'Apple audio format',
-        'default_bitrate': '192k',
-        'quality_options': ['96k', '128k', '192k', '256k', '320k']
-    },
-    'opus': {
-        'ext': 'opus',
-        'codec': 'libopus',
-        'name': 'Opus',
-        'description': 'Modern, efficient codec',
-        'default_bitrate': '128k',
-        'quality_options': ['64k', '96k', '128k', '192k', '256k']
-    },
-    'wma': {
-        'ext': 'wma',
-        'codec': 'wmav2',
-        'name': 'WMA',
-        'description': 'Windows Media Audio',
-        'default_bitrate': '128k',
-        'quality_options': ['64k', '96k', '128k', '192k', '256k']
-    }
+    'mp3': FormatSpec(
+        ext='mp3',
+        codec='libmp3lame',
+        name='MP3',
+        description='Most compatible format',
+        default_bitrate='192k',
+        quality_options=BITRATES_HIGH
+    ),
+    'ogg': FormatSpec(
+        ext='ogg',
+        codec='libvorbis',
+        name='OGG Vorbis',
+        description='Open format, perfect for game modding',
+        default_bitrate='128k',
+        quality_options=BITRATES_STANDARD
+    ),
+    'wav': FormatSpec(
+        ext='wav',
+        codec='pcm_s16le',
+        name='WAV',
+        description='Uncompressed, highest quality',
+        default_bitrate=None,
+        quality_options=()
+    ),
+    'flac': FormatSpec(
+        ext='flac',
+        codec='flac',
+        name='FLAC',
+        description='Lossless compression',
+        default_bitrate=None,
+        quality_options=()
+    ),
+    'aac': FormatSpec(
+        ext='aac',
+        codec='aac',
+        name='AAC',
+        description='Advanced audio coding',
+        default_bitrate='192k',
+        quality_options=BITRATES_HIGH
+    ),
+    'm4a': FormatSpec(
+        ext='m4a',
+        codec='aac',
+        name='M4A',
+        description='Apple audio format',
+        default_bitrate='192k',
+        quality_options=BITRATES_HIGH
+    ),
+    'opus': FormatSpec(
+        ext='opus',
+        codec='libopus',
+        name='Opus',
+        description='Modern, efficient codec',
+        default_bitrate='128k',
+        quality_options=BITRATES_STANDARD
+    ),
+    'wma': FormatSpec(
+        ext='wma',
+        codec='wmav2',
+        name='WMA',
+        description='Windows Media Audio',
+        default_bitrate='128k',
+        quality_options=BITRATES_STANDARD
+    )
 }
 
+# Format key for each output file extension
+EXT_TO_FORMAT = {spec.ext: key for key, spec in AUDIO_FORMATS.items()}
+
 # Sample Rate Options
 SAMPLE_RATES = {
-    'original': {'value': None, 'name': 'Original'},
-    '22050': {'value': 22050, 'name': '22.05 kHz'},
-    '32000': {'value': 32000, 'name': '32 kHz (HOI4 Standard)'},
-    '44100': {'value': 44100, 'name': '44.1 kHz (CD Quality)'},
-    '48000': {'value': 48000, 'name': '48 kHz (Professional)'},
-    '96000': {'value': 96000, 'name': '96 kHz (High-Res)'},
+    'original': SampleRate(value=None, name='Original'),
+    '22050': SampleRate(value=22050, name='22.05 kHz'),
+    '32000': SampleRate(value=32000, name='32 kHz (HOI4 Standard)'),
+    '44100': SampleRate(value=44100, name='44.1 kHz (CD Quality)'),
+    '48000': SampleRate(value=48000, name='48 kHz (Professional)'),
+    '96000': SampleRate(value=96000, name='96 kHz (High-Res)'),
+}
+
+# Audio settings for each supported game, shared by PRESETS and GAME_CONFIGS
+_GAME_AUDIO = {
+    'hoi4': GameAudio('ogg', 32000, '128k'),
+    'stellaris': GameAudio('ogg', 44100, '192k'),
+    'ck3': GameAudio('ogg', 48000, '192k'),
+    'eu4': GameAudio('ogg', 44100, '128k'),
+    'vic3': GameAudio('ogg', 48000, '192k'),
+}
+
+# Game mod presets: (name, description)
+_GAME_PRESETS = {
+    'hoi4': ('Hearts of Iron IV Mod', 'Optimal settings for HOI4 game mods'),
+    'stellaris': ('Stellaris Mod', 'Settings for Stellaris game mods'),
+    'ck3': ('Crusader Kings III Mod', 'Settings for CK3 game mods'),
 }
 
 # Preset Configurations
 PRESETS = {
-    'hoi4': {
-        'name': 'Hearts of Iron IV Mod',
-        'format': 'ogg',
-        'sample_rate': 32000,
-        'bitrate': '128k',
-        'description': 'Optimal settings for HOI4 game mods'
-    },
-    'stellaris': {
-        'name': 'Stellaris Mod',
-        'format': 'ogg',
-        'sample_rate': 44100,
-        'bitrate': '192k',
-        'description': 'Settings for Stellaris game mods'
-    },
-    'ck3': {
-        'name': 'Crusader Kings III Mod',
-        'format': 'ogg',
-        'sample_rate': 48000,
-        'bitrate': '192k',
-        'description': 'Settings for CK3 game mods'
-    },
-    'hq': {
-        'name': 'High Quality',
-        'format': 'flac',
-        'sample_rate': None,
-        'bitrate': None,
-        'description': 'Lossless audio preservation'
-    },
-    'compressed': {
-        'name': 'Compressed',
-        'format': 'mp3',
-        'sample_rate': 44100,
-        'bitrate': '128k',
-        'description': 'Small file size, good quality'
-    },
-    'podcast': {
-        'name': 'Podcast',
-        'format': 'mp3',
-        'sample_rate': 44100,
-        'bitrate': '96k',
-        'description': 'Optimized for speech'
-    },
-    'music_hq': {
-        'name': 'Music HQ',
-        'format': 'mp3',
-        'sample_rate': 44100,
-        'bitrate': '320k',
-        'description': 'High quality music'
-    },
-    'voice': {
-        'name': 'Voice Recording',
-        'format': 'mp3',
-        'sample_rate': 22050,
-        'bitrate': '64k',
-        'description': 'Optimized for voice recordings'
-    }
+    **{key: Preset(name=name, description=description, **_GAME_AUDIO[key]._asdict())
+       for key, (name, description) in _GAME_PRESETS.items()},
+    'hq': Preset(
+        name='High Quality',
+        format='flac',
+        sample_rate=None,
+        bitrate=None,
+        description='Lossless audio preservation'
+    ),
+    'compressed': Preset(
+        name='Compressed',
+        format='mp3',
+        sample_rate=44100,
+        bitrate='128k',
+        description='Small file size, good quality'
+    ),
+    'podcast': Preset(
+        name='Podcast',
+        format='mp3',
+        sample_rate=44100,
+        bitrate='96k',
+        description='Optimized for speech'
+    ),
+    'music_hq': Preset(
+        name='Music HQ',
+        format='mp3',
+        sample_rate=44100,
+        bitrate='320k',
+        description='High quality music'
+    ),
+    'voice': Preset(
+        name='Voice Recording',
+        format='mp3',
+        sample_rate=22050,
+        bitrate='64k',
+        description='Optimized for voice recordings'
+    )
 }
 
 # YouTube Download Configuration
@@ -174,22 +235,29 @@ YOUTUBE_CONFIG = {
 FFMPEG_CONFIG = {
     'threads': 0,  # 0 = auto-detect
     'overwrite': True,
-    'loglevel': 'error',  # quiet, panic, fatal, error, warning, info, verbose, debug
+    'loglevel': os.environ.get('FFMPEG_LOGLEVEL', 'error'),  # quiet, panic, fatal, error, warning, info, verbose, debug
     'hide_banner': True,
+    'fast_encoding': True,  # Lower MP3/Opus encoder complexity: faster, slightly lower quality at the same bitrate
 }
 
 # Conversion Configuration
 CONVERSION_CONFIG = {
     'max_parallel_jobs': 4,
+    'max_queued_jobs': 100,  # Reject new conversions (HTTP 429) beyond this
+    'ffmpeg_batch_size': 8,  # Uploaded files converted together in one ffmpeg process
+    'redis_url': None,  # e.g. 'redis://localhost:6379/0' to share jobs between worker processes
     'cleanup_temp_files': True,
     'cleanup_after_hours': 24,  # Delete old files after this many hours
     'max_file_size_mb': 500,
-    'allowed_extensions': [
+    'allowed_extensions': frozenset({
         '.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac',
         '.wma', '.opus', '.mp4', '.avi', '.mkv', '.webm'
-    ]
+    })
 }
 
+# Accepted input extensions, for membership checks
+ALLOWED_EXT_SET = CONVERSION_CONFIG['allowed_extensions']
+
 # UI Configuration
 UI_CONFIG = {
     'theme': 'modern',  # modern, classic, dark
@@ -257,7 +325,7 @@ FEATURES = {
 }
 
 # Export all configuration
-CONFIG = {
+_SECTIONS = {
     'server': SERVER_CONFIG,
     'directories': DIRECTORIES,
     'formats': AUDIO_FORMATS,
@@ -273,64 +341,125 @@ CONFIG = {
     'features': FEATURES,
 }
 
-# Game-specific configurations
-GAME_CONFIGS = {
-    'hoi4': {
-        'name': 'Hearts of Iron IV',
-        'audio_format': 'ogg',
-        'sample_rate': 32000,
-        'channels': 2,
-        'bitrate': '128k',
-        'notes': 'Place converted files in mod/music or mod/sound folders'
-    },
-    'stellaris': {
-        'name': 'Stellaris',
-        'audio_format': 'ogg',
-        'sample_rate': 44100,
-        'channels': 2,
-        'bitrate': '192k',
-        'notes': 'Use for custom music and sound effects'
-    },
-    'ck3': {
-        'name': 'Crusader Kings III',
-        'audio_format': 'ogg',
-        'sample_rate': 48000,
-        'channels': 2,
-        'bitrate': '192k',
-        'notes': 'Place in mod/music or mod/sound folders'
-    },
-    'eu4': {
-        'name': 'Europa Universalis IV',
-        'audio_format': 'ogg',
-        'sample_rate': 44100,
-        'channels': 2,
-        'bitrate': '128k',
-        'notes': 'Compatible with music mods'
-    },
-    'vic3': {
-        'name': 'Victoria 3',
-        'audio_format': 'ogg',
-        'sample_rate': 48000,
-        'channels': 2,
-        'bitrate': '192k',
-        'notes': 'Use for era-appropriate music'
-    }
+# Read-only views; changes go through update_config so the lookup caches stay in sync
+CONFIG = MappingProxyType({name: MappingProxyType(section) for name, section in _SECTIONS.items()})
+
+# Game-specific configurations: (name, notes), built into GAME_CONFIGS on first access
+_GAME_NOTES = {
+    'hoi4': ('Hearts of Iron IV', 'Place converted files in mod/music or mod/sound folders'),
+    'stellaris': ('Stellaris', 'Use for custom music and sound effects'),
+    'ck3': ('Crusader Kings III', 'Place in mod/music or mod/sound folders'),
+    'eu4': ('Europa Universalis IV', 'Compatible with music mods'),
+    'vic3': ('Victoria 3', 'Use for era-appropriate music'),
 }
 
+def _build_game_configs():
+    """Build the GAME_CONFIGS table"""
+    return {
+        key: GameConfig(
+            name=name,
+            audio_format=_GAME_AUDIO[key].format,
+            sample_rate=_GAME_AUDIO[key].sample_rate,
+            channels=2,
+            bitrate=_GAME_AUDIO[key].bitrate,
+            notes=notes
+        )
+        for key, (name, notes) in _GAME_NOTES.items()
+    }
+
+def __getattr__(name):
+    """Build lazily created module attributes"""
+    if name == 'GAME_CONFIGS':
+        globals()[name] = _build_game_configs()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _is_section(value):
+    """Whether value has dotted sub-keys (a mapping or a record such as FormatSpec)"""
+    return isinstance(value, Mapping) or (isinstance(value, tuple) and hasattr(value, '_asdict'))
+
+def _section_items(section):
+    """(key, value) pairs of a mapping or record"""
+    return section.items() if isinstance(section, Mapping) else section._asdict().items()
+
+def _flatten(config, prefix=''):
+    """Add every section and value under config to _FLAT_CONFIG by dotted key"""
+    for k, value in _section_items(config):
+        _FLAT_CONFIG[prefix + k] = value
+        if _is_section(value):
+            _flatten(value, prefix + k + '.')
+
+# Every dotted key in CONFIG, so reads are a single dict lookup
+_FLAT_CONFIG = {}
+_flatten(CONFIG)
+
 def get_config(key=None):
     """Get configuration value"""
-    if key:
-        keys = key.split('.')
-        value = CONFIG
-        for k in keys:
-            value = value.get(k)
-        return value
-    return CONFIG
+    return _FLAT_CONFIG.get(key) if key else CONFIG
+
+# Keys left out of get_config_json because they may carry credentials
+PRIVATE_CONFIG_KEYS = frozenset({'conversion.redis_url'})
+
+# Encoded get_config_json result, reset by update_config
+_CONFIG_JSON = None
+
+def _to_json_value(value, prefix=''):
+    """Convert value to plain dicts and lists, leaving out private keys"""
+    if _is_section(value):
+        return {k: _to_json_value(v, prefix + k + '.') for k, v in _section_items(value)
+                if prefix + k not in PRIVATE_CONFIG_KEYS}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(v) for v in value]
+    return value
+
+def get_config_json():
+    """Get the whole configuration as JSON bytes, encoded once per change"""
+    global _CONFIG_JSON
+    if _CONFIG_JSON is None:
+        data = _to_json_value(CONFIG)
+        _CONFIG_JSON = orjson.dumps(data) if orjson is not None else json.dumps(data).encode()
+    return _CONFIG_JSON
+
+# (parent dict, leaf key) for each dotted key passed to update_config
+_PARENT_CACHE = {}
 
 def update_config(key, value):
     """Update configuration value"""
-    keys = key.split('.')
-    config = CONFIG
-    for k in keys[:-1]:
-        config = config[k]
-    config[keys[-1]] = value
\ No newline at end of file
+    global _CONFIG_JSON
+    try:
+        parent, leaf = _PARENT_CACHE[key]
+    except KeyError:
+        keys = key.split('.')
+        parent = _SECTIONS
+        for k in keys[:-1]:
+            parent = parent[k]
+        leaf = keys[-1]
+
+        if not isinstance(parent, Mapping):
+            # Records such as FormatSpec are immutable; swap in a copy with the field changed
+            if leaf not in getattr(parent, '_fields', ()):
+                raise KeyError(key)
+            update_config(key.rpartition('.')[0], parent._replace(**{leaf: value}))
+            return
+        _PARENT_CACHE[key] = parent, leaf
+
+    prefix = key + '.'
+    if _is_section(parent.get(leaf)):
+        # Replacing a section orphans the cached parents and flat keys inside it
+        for cached_key in [k for k in _PARENT_CACHE if k.startswith(prefix)]:
+            del _PARENT_CACHE[cached_key]
+        for flat_key in [k for k in _FLAT_CONFIG if k.startswith(prefix)]:
+            del _FLAT_CONFIG[flat_key]
+    if parent is _SECTIONS:
+        # CONFIG holds views of the section dicts, so refill a section in place
+        parent[leaf].clear()
+        parent[leaf].update(value)
+        value = CONFIG[leaf]
+    else:
+        parent[leaf] = value
+    _FLAT_CONFIG[key] = value
+    if _is_section(value):
+        _flatten(value, prefix)
+    _CONFIG_JSON = None